@@ -0,0 +1,118 @@
+"""Memory footprint of the entities, checked against the documented budget.
+
+For every type of entity the benchmark measures the bytes of one entity
+object and the bytes one entity adds to a world (the entity, its position
+and the indexes of the world, the cells of the grid are not counted as they
+are allocated with the world). It exits with status 1 if a footprint is over
+the budget in FOOTPRINTS, the budget documented in README.md.
+
+    python benchmarks/memory.py
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from collections.abc import Callable
+from functools import partial
+from random import Random
+
+from simulation.actions import EntityFactory
+from simulation.config import GrassConfig, HerbivoreConfig, PredatorConfig
+from simulation.entities import Entity, Grass, Herbivore, Predator, Rock, Tree
+from simulation.factories import (
+    GrassFactory,
+    HerbivoreFactory,
+    PredatorFactory,
+    RockFactory,
+    TreeFactory,
+)
+from simulation.points import Point
+from simulation.world import World
+
+# Budget of bytes per entity (measured with 100 000 entities): the object,
+# the entity in the world. Rock and Tree are one shared object each and are
+# kept only in the cells of the grid.
+FOOTPRINTS: dict[type[Entity], tuple[int, int]] = {
+    Rock: (0, 0),
+    Tree: (0, 0),
+    Grass: (48, 352),
+    Herbivore: (96, 400),
+    Predator: (96, 400),
+}
+
+FACTORIES: dict[type[Entity], Callable[[], EntityFactory]] = {
+    Rock: RockFactory,
+    Tree: TreeFactory,
+    Grass: lambda: GrassFactory(GrassConfig(10)),
+    Herbivore: lambda: HerbivoreFactory(HerbivoreConfig(10)),
+    Predator: lambda: PredatorFactory(PredatorConfig(100, 3, 10, 10)),
+}
+
+
+def measure_bytes(run: Callable[[], object]) -> tuple[int, object]:
+    """Bytes allocated by run and still held after it, and its result"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = run()
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return allocated, result
+
+
+def measure_object(factory: EntityFactory, count: int) -> float:
+    allocated, entities = measure_bytes(partial(factory.spawn_many, count))
+    # Without the list of the entities
+    return (allocated - sys.getsizeof(entities)) / count
+
+
+def measure_in_world(factory: EntityFactory, count: int, seed: int) -> float:
+    size = int((count * 2) ** 0.5) + 1
+    world = World(size, size)
+    cells = world.sample_free_points(count, Random(seed))
+    free_cells = [point.y * size + point.x for point in cells]
+    del cells
+
+    def add() -> None:
+        points = [Point(cell % size, cell // size) for cell in free_cells]
+        world.add_many(zip(points, factory.spawn_many(count), strict=True))
+
+    allocated, _ = measure_bytes(add)
+    return allocated / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    over_budget = []
+    print(
+        f"{'entity':<10} {'object, B':>10} {'budget':>7} "
+        f"{'in world, B':>12} {'budget':>7}"
+    )
+    for entity_type, (object_budget, world_budget) in FOOTPRINTS.items():
+        factory = FACTORIES[entity_type]()
+        object_bytes = measure_object(factory, args.count)
+        world_bytes = measure_in_world(factory, args.count, args.seed)
+        print(
+            f"{entity_type.__name__:<10} "
+            f"{object_bytes:>10.1f} {object_budget:>7} "
+            f"{world_bytes:>12.1f} {world_budget:>7}"
+        )
+        if round(object_bytes) > object_budget or round(world_bytes) > world_budget:
+            over_budget.append(entity_type.__name__)
+
+    if over_budget:
+        print(f"\nOver the budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
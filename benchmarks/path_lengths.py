@@ -0,0 +1,184 @@
+"""Lengths of the paths of every path strategy, checked against A*.
+
+On fixed maps, an open one and a cluttered one, every strategy searches
+a path from every free cell to every other cell, with every topology and
+with and without the search radius. Every strategy finds the shortest
+paths, so a path of another length than the A* path, a path A* does not
+find or a path that is not a walk over free cells to the target is an
+error. It exits with status 1 if there are errors.
+
+    python benchmarks/path_lengths.py
+"""
+
+import argparse
+import sys
+from collections.abc import Callable
+from itertools import pairwise
+
+from simulation.entities import Rock
+from simulation.exceptions import NotFindPathError
+from simulation.find_path import (
+    EIGHT_NEIGHBOURS,
+    FOUR_NEIGHBOURS,
+    SIX_NEIGHBOURS,
+    AStarFindPathStrategy,
+    BfsFindPathStrategy,
+    BidirectionalFindPathStrategy,
+    Topology,
+)
+from simulation.points import Point
+from simulation.turns import FindPathStrategy
+from simulation.world import World
+
+# Rocks are "#", the cells next to the walled pocket of the cluttered map
+# can be reached only from inside it
+MAPS = {
+    "open": (
+        "................",
+        "................",
+        "...#............",
+        "..........#.....",
+        "................",
+        "......#.........",
+        "................",
+        "............#...",
+        "..#.............",
+        "................",
+    ),
+    "cluttered": (
+        "..#.....#.......",
+        "..#.##..#..###..",
+        "..#..#..#....#..",
+        "..####..####.#..",
+        ".............#..",
+        "#####.##.#####..",
+        "....#..#.#...#..",
+        ".##.#..#.#.#.#..",
+        ".#..#....#.#....",
+        ".#.###.###.###..",
+    ),
+}
+TOPOLOGIES = (FOUR_NEIGHBOURS, SIX_NEIGHBOURS, EIGHT_NEIGHBOURS)
+RADIUSES = (None, 3)
+STRATEGIES: dict[str, Callable[[Topology], FindPathStrategy]] = {
+    "bfs": BfsFindPathStrategy,
+    "bidirectional": BidirectionalFindPathStrategy,
+}
+
+
+def create_world(rows: tuple[str, ...]) -> World:
+    world = World(len(rows[0]), len(rows))
+    world.add_many(
+        (Point(x, y), Rock())
+        for y, row in enumerate(rows)
+        for x, cell in enumerate(row)
+        if cell == "#"
+    )
+    return world
+
+
+def find_length(
+    find_path: FindPathStrategy,
+    start: Point,
+    target: Point,
+    world: World,
+    radius: int | None,
+) -> int | None:
+    try:
+        return len(find_path(start, target, world, radius))
+    except NotFindPathError:
+        return None
+
+
+def check_path(
+    path: list[Point],
+    start: Point,
+    target: Point,
+    world: World,
+    topology: Topology,
+) -> bool:
+    """The path is a walk over free cells from the start to a cell next
+    to the target"""
+    if path[0] != start:
+        return False
+
+    for point, next_point in pairwise(path):
+        step = (next_point.x - point.x, next_point.y - point.y)
+        if step not in topology.offsets or world.is_used(next_point):
+            return False
+    last = path[-1]
+    return topology.steps_to_target(last.x - target.x, last.y - target.y) == 0
+
+
+def check_search(  # noqa: PLR0913
+    find_path: FindPathStrategy,
+    start: Point,
+    target: Point,
+    world: World,
+    topology: Topology,
+    radius: int | None,
+    expected: int | None,
+) -> str | None:
+    """Error of the search, None if it finds a path of the expected length"""
+    try:
+        path = find_path(start, target, world, radius)
+    except NotFindPathError:
+        return None if expected is None else f"no path, astar {expected}"
+
+    if len(path) != expected:
+        return f"{len(path)}, astar {expected}"
+    if not check_path(path, start, target, world, topology):
+        return f"not a path {path}"
+    return None
+
+
+def check_map(name: str, world: World) -> list[str]:
+    points = [Point(x, y) for y in range(world.hight) for x in range(world.width)]
+    starts = [point for point in points if not world.is_used(point)]
+    errors = []
+    for topology in TOPOLOGIES:
+        astar = AStarFindPathStrategy(topology)
+        strategies = {
+            strategy_name: create_strategy(topology)
+            for strategy_name, create_strategy in STRATEGIES.items()
+        }
+        for radius in RADIUSES:
+            for start in starts:
+                for target in points:
+                    if target == start:
+                        continue
+
+                    expected = find_length(astar, start, target, world, radius)
+                    for strategy_name, find_path in strategies.items():
+                        error = check_search(
+                            find_path, start, target, world, topology, radius, expected
+                        )
+                        if error is not None:
+                            errors.append(
+                                f"{name}/{topology.name}/r{radius}/{strategy_name}: "
+                                f"{start} -> {target}: {error}"
+                            )
+    return errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.parse_args()
+
+    errors = []
+    for name, rows in MAPS.items():
+        map_errors = check_map(name, create_world(rows))
+        print(f"{name:<10} {len(map_errors):>6} errors")
+        errors.extend(map_errors)
+
+    if errors:
+        print()
+        print("\n".join(errors[:20]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark of the World spatial queries against a full scan of the targets.
+
+By default the world grows with the population at a constant density, the time
+of World.nearest should stay flat while the scan grows linearly. With --size
+the world is fixed and the query time only grows with the density of entities
+inside the radius.
+
+    python benchmarks/spatial.py
+"""
+
+import argparse
+import math
+import time
+from random import Random
+
+from simulation.entities import Grass, Rock
+from simulation.points import Point
+from simulation.world import World
+
+
+def populate(world: World, population: int, rng: Random) -> None:
+    added = 0
+    while added < population:
+        point = Point(rng.randrange(world.width), rng.randrange(world.hight))
+        if world.is_used(point):
+            continue
+        entity = Grass(10) if added % 2 else Rock()
+        world.add(point, entity)
+        added += 1
+
+
+def scan_nearest(world: World, point: Point, max_radius: int) -> Point | None:
+    result_point = None
+    max_path = max_radius
+    for target_point, _ in world.get_entities(Grass):
+        current_path = abs(target_point.x - point.x) + abs(target_point.y - point.y)
+        if max_path > current_path:
+            max_path = current_path
+            result_point = target_point
+    return result_point
+
+
+def measure(world: World, points: list[Point], radius: int) -> tuple[float, float]:
+    start = time.perf_counter()
+    for point in points:
+        world.nearest(Grass, point, radius)
+    nearest_time = time.perf_counter() - start
+
+    scan_points = points[: max(len(points) // 100, 1)]
+    start = time.perf_counter()
+    for point in scan_points:
+        scan_nearest(world, point, radius)
+    scan_time = (time.perf_counter() - start) * len(points) / len(scan_points)
+
+    return nearest_time, scan_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=None)
+    parser.add_argument("--density", type=float, default=0.05)
+    parser.add_argument("--radius", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--populations",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000, 300_000],
+    )
+    args = parser.parse_args()
+
+    print(f"radius {args.radius}, {args.queries} queries")
+    print(f"{'population':>12} {'world':>11} {'nearest, us':>12} {'scan, us':>12}")
+    for population in args.populations:
+        size = args.size or math.isqrt(int(population / args.density)) + 1
+        rng = Random(args.seed)
+        world = World(size, size)
+        populate(world, population, rng)
+        points = [
+            Point(rng.randrange(size), rng.randrange(size)) for _ in range(args.queries)
+        ]
+        nearest_time, scan_time = measure(world, points, args.radius)
+        print(
+            f"{population:>12} "
+            f"{f'{size}x{size}':>11} "
+            f"{nearest_time / args.queries * 1e6:>12.2f} "
+            f"{scan_time / args.queries * 1e6:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,528 @@
+"""Benchmark suite of the world, path finding, spawning and full turns.
+
+Every case is run on worlds of the given sizes and densities of entities,
+seeded, so two runs measure the same work. Results are written as JSON, with
+--baseline they are compared with the results of a previous run and the
+suite exits with status 1 if a case got slower than the tolerance allows.
+It exits too if a path strategy finds a path of another length than A*.
+
+    python benchmarks/suite.py --output baseline.json
+    python benchmarks/suite.py --sizes 50x20 200x200 --baseline baseline.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from collections.abc import Callable, Iterator
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+from random import Random
+from typing import Any
+
+from simulation.actions import Spawn
+from simulation.builder import create_engine, get_default_config_path
+from simulation.config import GrassConfig, load_config_data, read_config_data
+from simulation.entities import Entity, Grass, Rock
+from simulation.exceptions import NotFindPathError
+from simulation.factories import GrassFactory
+from simulation.find_path import (
+    AStarFindPathStrategy,
+    BfsFindPathStrategy,
+    BidirectionalFindPathStrategy,
+)
+from simulation.points import Point
+from simulation.rng import RandomStreams
+from simulation.sweep import apply_overrides
+from simulation.turns import FindPathStrategy
+from simulation.world import World
+
+GROUPS = ("world", "path", "spawn", "turn")
+DEFAULT_SIZES = ("50x20", "200x200", "1000x1000", "2000x2000")
+DEFAULT_DENSITIES = (0.1, 0.3, 0.6)
+SPAWN_OCCUPANCIES = (0.9, 0.99)
+# Share of each kind of entity in the initial spawn of the full turn cases
+TURN_SPAWN_SHARES = {
+    "rock": 0.2,
+    "tree": 0.2,
+    "grass": 0.4,
+    "herbivore": 0.15,
+    "predator": 0.05,
+}
+PATH_STRATEGIES: dict[str, Callable[[], FindPathStrategy]] = {
+    "astar": AStarFindPathStrategy,
+    "bfs": BfsFindPathStrategy,
+    "bidirectional": BidirectionalFindPathStrategy,
+}
+
+
+@dataclass
+class Result:
+    name: str
+    ops: int
+    seconds: float
+
+    @property
+    def per_op(self) -> float:
+        return self.seconds / self.ops
+
+
+@dataclass
+class Options:
+    streams: RandomStreams
+    repeat: int
+    ops: int
+    path_radius: int
+    turns: int
+
+
+def parse_size(size: str) -> tuple[int, int]:
+    width, hight = size.lower().split("x")
+    return int(width), int(hight)
+
+
+def measure(
+    run: Callable[[], int],
+    repeat: int,
+    reset: Callable[[], object] | None = None,
+) -> tuple[int, float]:
+    """Best time of repeat runs and the number of operations of a run,
+    reset undoes a run before the next one and is not timed"""
+    best = float("inf")
+    ops = 0
+    for index in range(repeat):
+        if reset is not None and index:
+            reset()
+        start = time.perf_counter()
+        ops = run()
+        best = min(best, time.perf_counter() - start)
+    return ops, best
+
+
+def populate(world: World, density: float, rng: Random) -> None:
+    """Fill the world with rocks and grass up to the density"""
+    count = int(world.width * world.hight * density)
+    points = world.sample_free_points(count, rng)
+    entities: list[Entity] = [
+        Rock() if index % 2 else Grass(10) for index in range(len(points))
+    ]
+    world.add_many(zip(points, entities, strict=True))
+
+
+def add_entities(world: World, entities: list[tuple[Point, Entity]]) -> int:
+    for point, entity in entities:
+        world.add(point, entity)
+    return len(entities)
+
+
+def remove_entities(world: World, entities: list[tuple[Point, Entity]]) -> int:
+    for _, entity in entities:
+        world.remove(entity)
+    return len(entities)
+
+
+def check_points(world: World, points: list[Point]) -> int:
+    for point in points:
+        world.is_used(point)
+    return len(points)
+
+
+def get_grass(world: World, calls: int) -> int:
+    for _ in range(calls):
+        world.get_entities(Grass)
+    return calls
+
+
+def bench_world(
+    width: int,
+    hight: int,
+    density: float,
+    options: Options,
+) -> Iterator[Result]:
+    prefix = f"world/{width}x{hight}/d{density}"
+    rng = options.streams.get(prefix)
+    world = World(width, hight)
+    populate(world, density, rng)
+
+    points = world.sample_free_points(options.ops, rng)
+    entities: list[tuple[Point, Entity]] = [(point, Grass(10)) for point in points]
+    query_points = [
+        Point(rng.randrange(width), rng.randrange(hight)) for _ in range(options.ops)
+    ]
+
+    yield Result(
+        f"{prefix}/add",
+        *measure(
+            partial(add_entities, world, entities),
+            options.repeat,
+            partial(remove_entities, world, entities),
+        ),
+    )
+    yield Result(
+        f"{prefix}/remove",
+        *measure(
+            partial(remove_entities, world, entities),
+            options.repeat,
+            partial(add_entities, world, entities),
+        ),
+    )
+    yield Result(
+        f"{prefix}/is_used",
+        *measure(partial(check_points, world, query_points), options.repeat),
+    )
+    yield Result(
+        f"{prefix}/get_entities",
+        *measure(partial(get_grass, world, 10), options.repeat),
+    )
+
+
+def create_open_map(width: int, hight: int, density: float, rng: Random) -> World:
+    world = World(width, hight)
+    count = int(width * hight * density)
+    points = world.sample_free_points(count, rng)
+    world.add_many((point, Rock()) for point in points)
+    return world
+
+
+def create_maze_map(width: int, hight: int, rng: Random) -> World:
+    """Maze carved by a randomized depth-first search,
+    passages are the cells with even coordinates and the cells between them"""
+    passages = bytearray(width * hight)
+    stack = [(0, 0)]
+    passages[0] = 1
+    while stack:
+        x, y = stack[-1]
+        neighbours = [
+            (x + dx, y + dy)
+            for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+            if 0 <= x + dx < width
+            and 0 <= y + dy < hight
+            and not passages[(y + dy) * width + x + dx]
+        ]
+        if not neighbours:
+            stack.pop()
+            continue
+
+        next_x, next_y = rng.choice(neighbours)
+        passages[next_y * width + next_x] = 1
+        passages[(y + next_y) // 2 * width + (x + next_x) // 2] = 1
+        stack.append((next_x, next_y))
+
+    world = World(width, hight)
+    world.add_many(
+        (Point(cell % width, cell // width), Rock())
+        for cell, passage in enumerate(passages)
+        if not passage
+    )
+    return world
+
+
+def enclose(world: World, point: Point) -> None:
+    """Surround the point by a ring of rocks two cells away from it,
+    so no cell next to the point can be reached from outside"""
+    for dx in range(-2, 3):
+        for dy in range(-2, 3):
+            if max(abs(dx), abs(dy)) != 2:  # noqa: PLR2004
+                continue
+            ring_point = Point(point.x + dx, point.y + dy)
+            if ring_point not in world:
+                continue
+            if world.is_used(ring_point):
+                world.remove_at(ring_point)
+            world.add(ring_point, Rock())
+
+
+def create_queries(
+    world: World,
+    count: int,
+    radius: int,
+    rng: Random,
+    target: Point | None = None,
+) -> list[tuple[Point, Point]]:
+    """Pairs of free points not farther than the radius from each other,
+    with the target all pairs end at it and start outside its ring"""
+    free_cells = [cell for cell, entity in enumerate(world.cells) if entity is None]
+    width = world.width
+    queries: list[tuple[Point, Point]] = []
+    while len(queries) < count:
+        offset_x = rng.randint(-radius, radius)
+        offset_y = rng.randint(-radius, radius)
+        if target is None:
+            cell = free_cells[rng.randrange(len(free_cells))]
+            start = Point(cell % width, cell // width)
+            end = Point(start.x + offset_x, start.y + offset_y)
+        elif max(abs(offset_x), abs(offset_y)) > 2:  # noqa: PLR2004
+            start = Point(target.x + offset_x, target.y + offset_y)
+            end = target
+        else:
+            continue
+
+        if (
+            start != end
+            and start in world
+            and end in world
+            and not world.is_used(start)
+            and not world.is_used(end)
+        ):
+            queries.append((start, end))
+    return queries
+
+
+def search_paths(
+    find_path: FindPathStrategy,
+    world: World,
+    queries: list[tuple[Point, Point]],
+    radius: int,
+) -> int:
+    for start, target in queries:
+        with suppress(NotFindPathError):
+            find_path(start, target, world, radius)
+    return len(queries)
+
+
+def get_path_lengths(
+    find_path: FindPathStrategy,
+    world: World,
+    queries: list[tuple[Point, Point]],
+    radius: int,
+) -> list[int | None]:
+    lengths: list[int | None] = []
+    for start, target in queries:
+        try:
+            lengths.append(len(find_path(start, target, world, radius)))
+        except NotFindPathError:
+            lengths.append(None)
+    return lengths
+
+
+def bench_path_map(
+    name: str,
+    world: World,
+    queries: list[tuple[Point, Point]],
+    options: Options,
+) -> Iterator[Result]:
+    expected: list[int | None] | None = None
+    for strategy_name, create_strategy in PATH_STRATEGIES.items():
+        find_path = create_strategy()
+        # Every strategy finds the shortest paths, so of the same length
+        lengths = get_path_lengths(find_path, world, queries, options.path_radius)
+        if expected is None:
+            expected = lengths
+        elif lengths != expected:
+            sys.exit(f"{name}/{strategy_name}: paths of other length than astar")
+
+        search = partial(search_paths, find_path, world, queries, options.path_radius)
+        yield Result(f"{name}/{strategy_name}", *measure(search, options.repeat))
+
+
+def bench_path(
+    width: int,
+    hight: int,
+    densities: list[float],
+    options: Options,
+) -> Iterator[Result]:
+    prefix = f"path/{width}x{hight}"
+    queries_count = max(options.ops // 100, 10)
+    radius = min(options.path_radius, max(width, hight) // 2)
+
+    for density in densities:
+        name = f"{prefix}/open/d{density}"
+        rng = options.streams.get(name)
+        world = create_open_map(width, hight, density, rng)
+        queries = create_queries(world, queries_count, radius, rng)
+        yield from bench_path_map(name, world, queries, options)
+
+    name = f"{prefix}/maze"
+    rng = options.streams.get(name)
+    world = create_maze_map(width, hight, rng)
+    queries = create_queries(world, queries_count, radius, rng)
+    yield from bench_path_map(name, world, queries, options)
+
+    # Every search explores the whole square around its start
+    name = f"{prefix}/unreachable"
+    rng = options.streams.get(name)
+    world = create_open_map(width, hight, min(densities), rng)
+    target = Point(width // 2, hight // 2)
+    if world.is_used(target):
+        world.remove_at(target)
+    enclose(world, target)
+    queries = create_queries(world, queries_count, radius, rng, target)
+    yield from bench_path_map(name, world, queries, options)
+
+
+def spawn_entities(spawn: Spawn, world: World, count: int) -> int:
+    spawn(world)
+    return count
+
+
+def bench_spawn(width: int, hight: int, options: Options) -> Iterator[Result]:
+    for occupancy in SPAWN_OCCUPANCIES:
+        name = f"spawn/{width}x{hight}/o{occupancy}"
+        rng = options.streams.get(name)
+        world = World(width, hight)
+        populate(world, occupancy, rng)
+
+        count = min(options.ops, world.free_count)
+        spawn = Spawn(count, GrassFactory(GrassConfig(10)), rng)
+        yield Result(
+            name,
+            *measure(
+                partial(spawn_entities, spawn, world, count),
+                options.repeat,
+                partial(spawn.undo, world),
+            ),
+        )
+
+
+def bench_turn(
+    width: int,
+    hight: int,
+    density: float,
+    config_data: dict[str, Any],
+    options: Options,
+) -> Iterator[Result]:
+    name = f"turn/{width}x{hight}/d{density}"
+    cells = width * hight
+    overrides: dict[str, Any] = {
+        "world.width": width,
+        "world.hight": hight,
+        "seed": options.streams.get(name).getrandbits(63),
+    }
+    for kind, share in TURN_SPAWN_SHARES.items():
+        overrides[f"spawn.init.{kind}"] = int(cells * density * share)
+
+    config = load_config_data(apply_overrides(config_data, overrides))
+
+    best = float("inf")
+    for _ in range(options.repeat):
+        engine = create_engine(config, keep_history=False)
+        start = time.perf_counter()
+        for _ in range(options.turns):
+            engine.step()
+        best = min(best, time.perf_counter() - start)
+    yield Result(name, options.turns, best)
+
+
+def run_suite(
+    sizes: list[tuple[int, int]],
+    densities: list[float],
+    groups: list[str],
+    config_data: dict[str, Any],
+    options: Options,
+) -> Iterator[Result]:
+    for width, hight in sizes:
+        if "world" in groups:
+            for density in densities:
+                yield from bench_world(width, hight, density, options)
+        if "path" in groups:
+            yield from bench_path(width, hight, densities, options)
+        if "spawn" in groups:
+            yield from bench_spawn(width, hight, options)
+        if "turn" in groups:
+            for density in densities:
+                yield from bench_turn(width, hight, density, config_data, options)
+
+
+def compare(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    tolerance: float,
+) -> list[str]:
+    """Names of the cases slower than in the baseline by more than tolerance"""
+    baseline_per_op = {result["name"]: result["per_op"] for result in baseline}
+    regressions = []
+    print(f"\n{'case':<48} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for result in results:
+        name = result["name"]
+        if name not in baseline_per_op:
+            continue
+        ratio = result["per_op"] / baseline_per_op[name]
+        mark = ""
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            mark = " !"
+        print(
+            f"{name:<48} "
+            f"{baseline_per_op[name] * 1e6:>10.2f}us "
+            f"{result['per_op'] * 1e6:>10.2f}us "
+            f"{ratio:>7.2f}{mark}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--sizes", nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--densities",
+        type=float,
+        nargs="+",
+        default=list(DEFAULT_DENSITIES),
+    )
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--ops",
+        type=int,
+        default=10_000,
+        help="operations per run of a case, path cases make ops / 100 searches",
+    )
+    parser.add_argument("--path-radius", type=int, default=30)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--config", type=Path, default=get_default_config_path())
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown against the baseline, 0.25 is 25%%",
+    )
+    args = parser.parse_args()
+
+    options = Options(
+        RandomStreams(args.seed),
+        args.repeat,
+        args.ops,
+        args.path_radius,
+        args.turns,
+    )
+    results = []
+    print(f"{'case':<48} {'ops':>8} {'per op':>12}")
+    for result in run_suite(
+        [parse_size(size) for size in args.sizes],
+        args.densities,
+        args.groups,
+        read_config_data(args.config),
+        options,
+    ):
+        print(f"{result.name:<48} {result.ops:>8} {result.per_op * 1e6:>10.2f}us")
+        results.append({**asdict(result), "per_op": result.per_op})
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
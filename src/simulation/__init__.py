@@ -1,3 +1,4 @@
-__all__ = ["Simulation"]
+__all__ = ["Engine", "Simulation"]
 
+from simulation.engine import Engine
 from simulation.simulation import Simulation
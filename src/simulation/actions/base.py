@@ -9,3 +9,16 @@ class Action(ABC):
 
     @abstractmethod
     def undo(self, world: World) -> None: ...
+
+    @property
+    def name(self) -> str:
+        """Name of the action in profiles"""
+        return type(self).__name__
+
+    def rewind(self) -> None:  # noqa: B027
+        """Reverse the state of the action after a turn was undone by History,
+        which has already restored the world"""
+
+    def restart(self, turns_made: int) -> None:  # noqa: B027
+        """Set the state of the action as if turns_made turns were made,
+        after the world was restored from a snapshot"""
@@ -24,6 +24,23 @@ class IntervalAction(Action):
 
         self._count_executed -= 1
 
+    @override
+    def rewind(self) -> None:
+        if self._is_execute_now():
+            self._action.rewind()
+
+        self._count_executed -= 1
+
+    @override
+    def restart(self, turns_made: int) -> None:
+        self._count_executed = turns_made
+        self._action.restart(turns_made // self._interval)
+
+    @property
+    @override
+    def name(self) -> str:
+        return self._action.name
+
     def _is_execute_now(self) -> bool:
         return self._count_executed % self._interval == 0
 
@@ -1,9 +1,8 @@
-from random import randrange
+from random import Random
 from typing import Protocol, Self, override
 
 from simulation.actions.base import Action
 from simulation.entities import Entity
-from simulation.exceptions import PointAlreadyUsedError
 from simulation.points import Point
 from simulation.world import World
 
@@ -11,39 +10,41 @@ from simulation.world import World
 class EntityFactory(Protocol):
     def spawn_entity(self) -> Entity: ...
 
+    def spawn_many(self, count: int) -> list[Entity]:
+        """Entities for a bulk spawn, factories may create them faster"""
+        return [self.spawn_entity() for _ in range(count)]
+
 
 class Spawn(Action):
-    def __init__(self, count_entity: int, factory_entity: EntityFactory):
+    def __init__(
+        self,
+        count_entity: int,
+        factory_entity: EntityFactory,
+        rng: Random | None = None,
+    ):
         self._count_entity = count_entity
         self._factory_entity = factory_entity
+        self._rng = Random() if rng is None else rng
 
-        self._spawned_entity: list[Entity] = []
+        self._spawned_points: list[Point] = []
 
     @override
     def __call__(self, world: World) -> None:
-        self._spawned_entity = []
-
-        count_spawned_entity = 0
-        while count_spawned_entity < self._count_entity:
-            entity = self._factory_entity.spawn_entity()
-            x = randrange(0, world.width)
-            y = randrange(0, world.hight)
-            try:
-                world.add(Point(x, y), entity)
-            except PointAlreadyUsedError:
-                continue
-
-            self._spawned_entity.append(entity)
+        """Spawn entities at random free points, as many as there are
+        free points if the world is too full"""
+        points = world.sample_free_points(self._count_entity, self._rng)
+        entities = self._factory_entity.spawn_many(len(points))
+        world.add_many(zip(points, entities, strict=True))
 
-            count_spawned_entity += 1
+        self._spawned_points = points
 
     @override
     def undo(self, world: World) -> None:
-        for entity in self._spawned_entity:
-            world.remove(entity)
+        for point in self._spawned_points:
+            world.remove_at(point)
 
     def __copy__(self) -> Self:
         cls = self.__class__
-        self_copy = cls(self._count_entity, self._factory_entity)
-        self_copy._spawned_entity = list(self._spawned_entity)  # noqa: SLF001
+        self_copy = cls(self._count_entity, self._factory_entity, self._rng)
+        self_copy._spawned_points = list(self._spawned_points)  # noqa: SLF001
         return self_copy
@@ -1,10 +1,11 @@
+import time
 from copy import copy
 from typing import Any, override
 
 from simulation.actions.base import Action
 from simulation.entities import Creature
-from simulation.exceptions import EntityNotFoundError
-from simulation.turns.base import Turn
+from simulation.profiling import Profiler
+from simulation.turns.base import Turn, get_living_position
 from simulation.world import World
 
 
@@ -20,23 +21,57 @@ class TurnMap:
 
 
 class TurnAction(Action):
-    def __init__(self, turn_map: TurnMap):
+    """Turns of all living creatures.
+
+    With keep_history copies of the executed turns are kept for undo,
+    it is not needed when turns are undone by History. With a profiler
+    the time of every Turn class is recorded.
+
+    A creature makes all its turns before the next creature, the turns of
+    every creature type are taken from the turn map once per turn.
+    """
+
+    def __init__(
+        self,
+        turn_map: TurnMap,
+        *,
+        keep_history: bool = True,
+        profiler: Profiler | None = None,
+    ):
         self._turn_map = turn_map
+        self._keep_history = keep_history
+        self._profiler = profiler
         self._executed_turns: list[tuple[Creature, Turn[Creature]]] = []
 
     @override
     def __call__(self, world: World) -> None:
         self._executed_turns = []
 
+        profiler = self._profiler
+        keep_history = self._keep_history
+        turns_by_type: dict[type[Creature], list[Turn[Any]]] = {}
         all_enititys = world.get_entities(Creature)
         for _, entity in all_enititys:
-            if self._is_dead(entity, world):
+            if get_living_position(entity, world) is None:
                 continue
 
-            turns = self._turn_map.get(type(entity))
+            creature_type = type(entity)
+            turns = turns_by_type.get(creature_type)
+            if turns is None:
+                turns = self._turn_map.get(creature_type)
+                turns_by_type[creature_type] = turns
             for turn in turns:
-                is_turn_end = turn(entity, world)
-                self._executed_turns.append((entity, copy(turn)))
+                if profiler is None:
+                    is_turn_end = turn(entity, world)
+                else:
+                    start = time.perf_counter()
+                    is_turn_end = turn(entity, world)
+                    profiler.add_time(
+                        f"turn.{type(turn).__name__}",
+                        time.perf_counter() - start,
+                    )
+                if keep_history:
+                    self._executed_turns.append((entity, copy(turn)))
                 if is_turn_end:
                     break
 
@@ -45,14 +80,3 @@ class TurnAction(Action):
         for entity, turn in reversed(self._executed_turns):
             turn.undo(entity, world)
         self._executed_turns = []
-
-    def _is_dead(self, creature: Creature, world: World) -> bool:
-        if creature.hp <= 0:
-            return True
-
-        try:
-            world.get_entity_position(creature)
-        except EntityNotFoundError:
-            return True
-
-        return False
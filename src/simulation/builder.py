@@ -0,0 +1,222 @@
+from pathlib import Path
+
+from simulation.actions import (
+    Action,
+    EntityFactory,
+    IntervalAction,
+    Spawn,
+    TurnAction,
+    TurnMap,
+)
+from simulation.config import (
+    Config,
+    FindPathAlgorithm,
+    FindPathConfig,
+    FindPathTopology,
+    RenderMode,
+    load_config,
+)
+from simulation.engine import Engine
+from simulation.entities import Entity, Grass, Herbivore, Predator, Rock, Tree
+from simulation.factories import (
+    GrassFactory,
+    HerbivoreFactory,
+    PredatorFactory,
+    RockFactory,
+    TreeFactory,
+)
+from simulation.find_path import (
+    EIGHT_NEIGHBOURS,
+    FOUR_NEIGHBOURS,
+    SIX_NEIGHBOURS,
+    AStarFindPathStrategy,
+    BfsFindPathStrategy,
+    BidirectionalFindPathStrategy,
+    LocalRepairPathCache,
+    ProfiledFindPathStrategy,
+    Topology,
+)
+from simulation.history import History
+from simulation.presentation.renderer import IncrementalRenderer, Renderer
+from simulation.profiling import Profiler
+from simulation.rng import RandomStreams
+from simulation.snapshot import Keyframes
+from simulation.stats import TurnStats
+from simulation.turns import Attack, Eat, FindPathStrategy, Move, Starve
+from simulation.world import World
+
+DEFAULT_CONFIG_PATH = Path("config.toml")
+EXAMPLE_CONFIG_PATH = Path("config.example.toml")
+
+
+def get_default_config_path() -> Path:
+    if DEFAULT_CONFIG_PATH.exists():
+        return DEFAULT_CONFIG_PATH
+    return EXAMPLE_CONFIG_PATH
+
+
+def load_default_config() -> Config:
+    return load_config(get_default_config_path())
+
+
+def create_renderer(config: Config) -> Renderer:
+    entity_icon: dict[type[Entity], str] = {
+        Predator: config.icon.predator,
+        Herbivore: config.icon.herbivore,
+        Rock: config.icon.rock,
+        Grass: config.icon.grass,
+        Tree: config.icon.tree,
+    }
+    default_icon = config.icon.default
+    match config.render.mode:
+        case RenderMode.full:
+            return Renderer(entity_icon, default_icon)
+        case RenderMode.incremental:
+            return IncrementalRenderer(entity_icon, default_icon)
+
+
+def create_engine(
+    config: Config,
+    *,
+    keep_history: bool = True,
+    profiler: Profiler | None = None,
+    stats: TurnStats | None = None,
+) -> Engine:
+    world = World(config.world.width, config.world.hight)
+    streams = RandomStreams(config.seed)
+
+    eat = Eat()
+    find_path_strategy = create_find_path_strategy(config.find_path)
+    move_find_path = find_path_strategy
+    if profiler is not None:
+        move_find_path = ProfiledFindPathStrategy(find_path_strategy, profiler)
+    path_cache = None
+    if config.find_path.cache_paths:
+        path_cache = LocalRepairPathCache(
+            move_find_path, create_topology(config.find_path.topology)
+        )
+    move = Move(move_find_path, streams.get("move"), path_cache)
+
+    turn_map = TurnMap()
+    starve = Starve(config.starve.power)
+    turn_map.add(Predator, [starve, move, Attack(), eat])
+    turn_map.add(Herbivore, [starve, move, eat])
+
+    grass_factory = GrassFactory(config.entity.grass)
+    herbivore_factory = HerbivoreFactory(config.entity.herbivore)
+    predator_factory = PredatorFactory(config.entity.predator)
+
+    interval_config = config.spawn.interval
+    interval_spawn_actions = [
+        IntervalAction(
+            interval_config.grass.interval,
+            Spawn(
+                interval_config.grass.count,
+                grass_factory,
+                streams.get("spawn.interval.grass"),
+            ),
+        ),
+        IntervalAction(
+            interval_config.herbivore.interval,
+            Spawn(
+                interval_config.herbivore.count,
+                herbivore_factory,
+                streams.get("spawn.interval.herbivore"),
+            ),
+        ),
+        IntervalAction(
+            interval_config.predator.interval,
+            Spawn(
+                interval_config.predator.count,
+                predator_factory,
+                streams.get("spawn.interval.predator"),
+            ),
+        ),
+    ]
+
+    turn_actions: list[Action] = [
+        TurnAction(turn_map, keep_history=False, profiler=profiler),
+        *interval_spawn_actions,
+    ]
+
+    tree_factory = TreeFactory()
+    rock_factory = RockFactory()
+
+    init_config = config.spawn.init
+    init_actions: list[Action] = [
+        Spawn(
+            init_config.predator,
+            predator_factory,
+            streams.get("spawn.init.predator"),
+        ),
+        Spawn(
+            init_config.tree,
+            tree_factory,
+            streams.get("spawn.init.tree"),
+        ),
+        Spawn(
+            init_config.rock,
+            rock_factory,
+            streams.get("spawn.init.rock"),
+        ),
+        Spawn(
+            init_config.grass,
+            grass_factory,
+            streams.get("spawn.init.grass"),
+        ),
+        Spawn(
+            init_config.herbivore,
+            herbivore_factory,
+            streams.get("spawn.init.herbivore"),
+        ),
+    ]
+
+    factories: dict[type[Entity], EntityFactory] = {
+        Predator: predator_factory,
+        Herbivore: herbivore_factory,
+        Grass: grass_factory,
+        Tree: tree_factory,
+        Rock: rock_factory,
+    }
+
+    # Without history keyframes are not kept either, only checkpoints are
+    history = None
+    keyframes = Keyframes(factories, streams, path_cache=path_cache)
+    if keep_history:
+        history = History(
+            world,
+            config.history.max_turns,
+            config.history.max_bytes,
+        )
+        keyframes = Keyframes(
+            factories,
+            streams,
+            config.keyframes.interval,
+            path_cache,
+            config.keyframes.max_count,
+        )
+
+    return Engine(
+        world, init_actions, turn_actions, history, keyframes, profiler, stats
+    )
+
+
+def create_find_path_strategy(find_path_config: FindPathConfig) -> FindPathStrategy:
+    topology = create_topology(find_path_config.topology)
+    match find_path_config.algorithm:
+        case FindPathAlgorithm.astar:
+            return AStarFindPathStrategy(topology)
+        case FindPathAlgorithm.bfs:
+            return BfsFindPathStrategy(topology)
+        case FindPathAlgorithm.bidirectional:
+            return BidirectionalFindPathStrategy(topology)
+
+
+def create_topology(topology: FindPathTopology) -> Topology:
+    match topology:
+        case FindPathTopology.four:
+            return FOUR_NEIGHBOURS
+        case FindPathTopology.six:
+            return SIX_NEIGHBOURS
+        case FindPathTopology.eight:
+            return EIGHT_NEIGHBOURS
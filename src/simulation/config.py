@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import tomllib
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import Enum
 from pathlib import Path
+from typing import Any
 
 from adaptix import Retort
 
@@ -16,6 +18,11 @@ class Config:
     spawn: SpawnConfig
     icon: IconConfig
     starve: StarveConfig
+    find_path: FindPathConfig = field(default_factory=lambda: FindPathConfig())
+    history: HistoryConfig = field(default_factory=lambda: HistoryConfig())
+    keyframes: KeyframesConfig = field(default_factory=lambda: KeyframesConfig())
+    render: RenderConfig = field(default_factory=lambda: RenderConfig())
+    seed: int | None = None
 
 
 @dataclass
@@ -90,14 +97,68 @@ class IconConfig:
     default: str
 
 
+class RenderMode(Enum):
+    full = "full"
+    incremental = "incremental"
+
+
+@dataclass
+class RenderConfig:
+    mode: RenderMode = RenderMode.full
+    # Frames per second the world is rendered at most
+    fps: float = 30
+    # Seconds between turns of the interactive simulation, 0 - no pause
+    turn_interval: float = 1
+
+
 @dataclass
 class StarveConfig:
     power: int
 
 
+class FindPathAlgorithm(Enum):
+    astar = "astar"
+    bfs = "bfs"
+    bidirectional = "bidirectional"
+
+
+class FindPathTopology(Enum):
+    four = 4
+    six = 6
+    eight = 8
+
+
+@dataclass
+class FindPathConfig:
+    algorithm: FindPathAlgorithm = FindPathAlgorithm.astar
+    topology: FindPathTopology = FindPathTopology.six
+    # Creatures keep their paths between turns and only repair them
+    cache_paths: bool = False
+
+
+@dataclass
+class HistoryConfig:
+    max_turns: int | None = 1000
+    max_bytes: int | None = 16 * 1024 * 1024
+
+
+@dataclass
+class KeyframesConfig:
+    interval: int | None = 100
+    # More keyframes are thinned out: every second one is dropped
+    # and the interval is doubled
+    max_count: int | None = 100
+
+
 def load_config(path: Path) -> Config:
+    return load_config_data(read_config_data(path))
+
+
+def read_config_data(path: Path) -> dict[str, Any]:
     with path.open(mode="rb") as f:
-        data = tomllib.load(f)
+        return tomllib.load(f)
+
 
+def load_config_data(data: dict[str, Any]) -> Config:
     config = retort.load(data, Config)
     return config
@@ -0,0 +1,198 @@
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from simulation.actions.base import Action
+from simulation.history import History
+from simulation.profiling import Profiler
+from simulation.snapshot import Keyframes, Snapshot
+from simulation.stats import TurnStats
+from simulation.world import World
+
+
+class Engine:
+    """Headless simulation core: runs turns as fast as possible,
+    without rendering, sleeping or polling user commands.
+
+    Undo needs the history, seek, checkpoints and turns after undo need
+    the keyframes (see History). The profiler records the time of actions
+    and the world changes, the stats the population and duration of turns.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        world: World,
+        init_actions: list[Action],
+        turn_actions: list[Action],
+        history: History | None = None,
+        keyframes: Keyframes | None = None,
+        profiler: Profiler | None = None,
+        stats: TurnStats | None = None,
+    ):
+        self.world = world
+        self._turn_actions = turn_actions
+        self._history = history
+        self._keyframes = keyframes
+        self._profiler = profiler
+        self._stats = stats
+        self.turn_number = 1
+        # Turns were undone since the world was restored or created
+        self._rewound = False
+
+        for init_action in init_actions:
+            init_action(self.world)
+
+        if profiler is not None:
+            world.subscribe(profiler)
+        if stats is not None:
+            stats.watch(world)
+
+        if keyframes is not None:
+            keyframes.on_turn(self.world, self.turn_number)
+
+    def step(self, turns: int = 1) -> None:
+        for _ in range(turns):
+            self._simulate_turn()
+
+    def run_until(
+        self,
+        predicate: Callable[["Engine"], bool],
+        max_turns: int | None = None,
+    ) -> int:
+        """Run turns until predicate is true or max_turns turns are made.
+
+        Returns the number of turns made
+        """
+        turns = 0
+        while not predicate(self):
+            if max_turns is not None and turns >= max_turns:
+                break
+            self._simulate_turn()
+            turns += 1
+        return turns
+
+    def undo(self) -> bool:
+        """Reverse the last turn, False if there is no turn in the history"""
+        if self._history is None or not self._history.undo_turn():
+            return False
+
+        for turn_action in reversed(self._turn_actions):
+            turn_action.rewind()
+
+        self.turn_number -= 1
+        self._rewound = True
+        return True
+
+    def seek(self, turn_number: int) -> None:
+        """Go to the start of the turn: back through the history if the turn
+        is in it, otherwise from the latest keyframe before the turn,
+        or forward by simulating the turns in between"""
+        if turn_number < 1:
+            raise ValueError(f"There is no turn {turn_number}")
+
+        turns_back = self.turn_number - turn_number
+        if 0 < turns_back <= self.history_turns:
+            for _ in range(turns_back):
+                self.undo()
+            return
+
+        if self._keyframes is not None:
+            keyframe = self._keyframes.find(turn_number)
+            if keyframe is not None and (
+                turns_back > 0
+                or keyframe.turn_number > self.turn_number
+                or self._rewound
+            ):
+                self.restore(keyframe)
+
+        if self.turn_number > turn_number:
+            raise ValueError(f"Turn {turn_number} is neither in history nor keyframes")
+
+        self.step(turn_number - self.turn_number)
+
+    @property
+    def history_turns(self) -> int:
+        """Number of turns that can be undone"""
+        if self._history is None:
+            return 0
+        return len(self._history)
+
+    def snapshot(self) -> Snapshot:
+        return self._get_keyframes().capture(self.world, self.turn_number)
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """Continue the simulation from the snapshot, the history is cleared"""
+        self._get_keyframes().restore(self.world, snapshot)
+        self.turn_number = snapshot.turn_number
+        self._rewound = False
+
+        for turn_action in self._turn_actions:
+            turn_action.restart(snapshot.turn_number - 1)
+
+    def save_checkpoint(self, path: Path) -> None:
+        self.snapshot().save(path)
+
+    def load_checkpoint(self, path: Path) -> None:
+        self.restore(Snapshot.load(path))
+
+    def _get_keyframes(self) -> Keyframes:
+        if self._keyframes is None:
+            raise RuntimeError("Engine was created without keyframes")
+        return self._keyframes
+
+    def _replay(self) -> None:
+        """Replace the world after undo with the world restored from the latest
+        keyframe and replayed up to the current turn"""
+        self._rewound = False
+        if self._keyframes is None:
+            return
+
+        keyframe = self._keyframes.find(self.turn_number)
+        if keyframe is None:
+            return
+
+        turn_number = self.turn_number
+        self.restore(keyframe)
+        self.step(turn_number - self.turn_number)
+
+    def _simulate_turn(self) -> None:
+        if self._rewound:
+            self._replay()
+
+        history = self._history
+        if history is not None:
+            history.start_turn()
+        stats = self._stats
+        if stats is not None:
+            stats.start_turn()
+            turn_start = time.perf_counter()
+
+        profiler = self._profiler
+        if profiler is None:
+            for turn_action in self._turn_actions:
+                turn_action(self.world)
+        else:
+            self._profile_turn(profiler)
+
+        if history is not None:
+            history.end_turn()
+        if stats is not None:
+            stats.end_turn(self.turn_number, time.perf_counter() - turn_start)
+
+        self.turn_number += 1
+
+        if self._keyframes is not None:
+            self._keyframes.on_turn(self.world, self.turn_number)
+
+    def _profile_turn(self, profiler: Profiler) -> None:
+        turn_start = time.perf_counter()
+        for turn_action in self._turn_actions:
+            start = time.perf_counter()
+            turn_action(self.world)
+            profiler.add_time(
+                f"action.{turn_action.name}",
+                time.perf_counter() - start,
+            )
+
+        profiler.add_time("turn", time.perf_counter() - turn_start)
+        profiler.end_turn(self.turn_number)
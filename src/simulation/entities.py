@@ -1,19 +1,42 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import ClassVar, override
+from typing import ClassVar, Self, override
 
 
-class Entity: ...
+class Entity:
+    __slots__ = ()
+
+
+class StaticEntity(Entity):
+    """Entity without state: all instances of a type are one shared object.
+
+    The world keeps static entities only in its grid, so they take no memory
+    per cell besides the grid itself. They are removed by World.remove_at
+    and are not found by the radius queries World.nearest and World.within.
+    """
+
+    __slots__ = ()
+
+    _instance: ClassVar["StaticEntity | None"] = None
+
+    def __new__(cls) -> Self:
+        instance = cls.__dict__.get("_instance")
+        if instance is None:
+            instance = super().__new__(cls)
+            cls._instance = instance
+        return instance
 
 
 class Target(ABC, Entity):
+    __slots__ = ()
+
     nutritional_quality: int
 
     @abstractmethod
     def can_eaten(self) -> bool: ...
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Grass(Target):
     nutritional_quality: int
 
@@ -22,14 +45,20 @@ class Grass(Target):
         return True
 
 
-class Rock(Entity): ...
+class Rock(StaticEntity):
+    __slots__ = ()
 
 
-class Tree(Entity): ...
+class Tree(StaticEntity):
+    __slots__ = ()
 
 
 @dataclass(eq=False)
 class Creature(Entity):
+    # Slots of creatures are listed by hand: slots generated by the dataclass
+    # would not include _max_hp, which is not a field
+    __slots__ = ("_max_hp", "hp", "speed", "visual_radius")
+
     target: ClassVar[type[Target]]
 
     hp: int
@@ -46,6 +75,8 @@ class Creature(Entity):
 
 @dataclass(eq=False)
 class Herbivore(Target, Creature):
+    __slots__ = ("nutritional_quality",)
+
     target = Grass
 
     nutritional_quality: int
@@ -57,6 +88,8 @@ class Herbivore(Target, Creature):
 
 @dataclass(eq=False)
 class Predator(Creature):
+    __slots__ = ("power",)
+
     target = Herbivore
 
     power: int
@@ -5,3 +5,9 @@ class NotFindPathError(Exception): ...
 
 
 class PointAlreadyUsedError(Exception): ...
+
+
+class PointOutsideWorldError(Exception): ...
+
+
+class SnapshotFormatError(Exception): ...
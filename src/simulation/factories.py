@@ -2,7 +2,7 @@ from typing import override
 
 from simulation.actions import EntityFactory
 from simulation.config import GrassConfig, HerbivoreConfig, PredatorConfig
-from simulation.entities import Grass, Herbivore, Predator, Rock, Tree
+from simulation.entities import Entity, Grass, Herbivore, Predator, Rock, Tree
 
 
 class HerbivoreFactory(EntityFactory):
@@ -50,6 +50,10 @@ class TreeFactory(EntityFactory):
     def spawn_entity(self) -> Tree:
         return Tree()
 
+    @override
+    def spawn_many(self, count: int) -> list[Entity]:
+        return [Tree()] * count
+
 
 class GrassFactory(EntityFactory):
     def __init__(
@@ -67,3 +71,7 @@ class RockFactory(EntityFactory):
     @override
     def spawn_entity(self) -> Rock:
         return Rock()
+
+    @override
+    def spawn_many(self, count: int) -> list[Entity]:
+        return [Rock()] * count
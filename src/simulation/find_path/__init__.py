@@ -1,10 +1,26 @@
 """Module to implement algorithms for finding the path to the target"""
 
 __all__ = [
+    "EIGHT_NEIGHBOURS",
+    "FOUR_NEIGHBOURS",
+    "SIX_NEIGHBOURS",
     "AStarFindPathStrategy",
     "BfsFindPathStrategy",
+    "BidirectionalFindPathStrategy",
+    "LocalRepairPathCache",
+    "ProfiledFindPathStrategy",
+    "Topology",
 ]
 
 
 from simulation.find_path.astar import AStarFindPathStrategy
 from simulation.find_path.bfs import BfsFindPathStrategy
+from simulation.find_path.bidirectional import BidirectionalFindPathStrategy
+from simulation.find_path.cache import LocalRepairPathCache
+from simulation.find_path.neighbours import (
+    EIGHT_NEIGHBOURS,
+    FOUR_NEIGHBOURS,
+    SIX_NEIGHBOURS,
+    Topology,
+)
+from simulation.find_path.profiled import ProfiledFindPathStrategy
@@ -2,39 +2,102 @@ import heapq
 from typing import override
 
 from simulation.exceptions import NotFindPathError
-from simulation.points import Point, get_closest_points, get_distance, is_closest_point
+from simulation.find_path.buffers import SearchBuffers, get_search_square
+from simulation.find_path.neighbours import (
+    SIX_NEIGHBOURS,
+    UNKNOWN,
+    Topology,
+    get_neighbour_table,
+)
+from simulation.points import Point, to_cell
 from simulation.turns.move import FindPathStrategy
 from simulation.world import World
 
 
 class AStarFindPathStrategy(FindPathStrategy):
+    def __init__(self, topology: Topology = SIX_NEIGHBOURS) -> None:
+        self._topology = topology
+        self._buffers = SearchBuffers()
+        self.expanded_nodes = 0
+
     @override
     def __call__(
         self,
         current_point: Point,
         target_point: Point,
         world: World,
+        max_distance: int | None = None,
     ) -> list[Point]:
-        checked_points: set[Point] = set()
-        heap: list[tuple[int, Point, list[Point]]] = [(1, current_point, [])]
+        width = world.width
+        cells = world.cells
+        table = get_neighbour_table(world, self._topology)
+        masks = table.masks
+        steps = table.steps
+        steps_to_target = self._topology.steps_to_target
+        buffers = self._buffers
+        search_id = buffers.start(width * world.hight)
+        opened = buffers.opened
+        closed = buffers.closed
+        cost = buffers.cost
+        parent = buffers.parent
+
+        target_x, target_y = target_point
+        min_x, max_x, min_y, max_y = get_search_square(
+            current_point, world, max_distance
+        )
+
+        start = to_cell(current_point, width)
+        opened[start] = search_id
+        cost[start] = 0
+        distance = steps_to_target(
+            current_point.x - target_x,
+            current_point.y - target_y,
+        )
+        heap = [(distance, distance, start)]
+        expanded = 0
 
         while heap:
-            _, check_point, path = heapq.heappop(heap)
-            if check_point in checked_points:
+            _, distance, cell = heapq.heappop(heap)
+            if closed[cell] == search_id:
                 continue
 
-            if is_closest_point(check_point, target_point):
-                return [*path, check_point]
+            expanded += 1
+            if distance == 0:
+                self.expanded_nodes = expanded
+                return buffers.build_path(start, cell, width)
+
+            closed[cell] = search_id
+            y, x = divmod(cell, width)
+            # Neighbours of the cells inside the square are inside it too
+            on_border = not (min_x < x < max_x and min_y < y < max_y)
+            point_cost = cost[cell] + 1
 
-            checked_points.add(check_point)
-            closest_points = get_closest_points(check_point, radius=1)
+            mask = masks[cell]
+            if mask == UNKNOWN:
+                mask = table.update(cell)
+            for step, dx, dy in steps[mask]:
+                point = cell + step
+                if cells[point] is not None or closed[point] == search_id:
+                    continue
+
+                point_x = x + dx
+                point_y = y + dy
+                if on_border and not (
+                    min_x <= point_x <= max_x and min_y <= point_y <= max_y
+                ):
+                    continue
 
-            for point in closest_points:
-                if point not in world or world.is_used(point):
+                if opened[point] == search_id and cost[point] <= point_cost:
                     continue
 
-                point_path = [*path, check_point]
-                distance = get_distance(point, target_point)
-                heapq.heappush(heap, (len(point_path) + distance, point, point_path))
+                opened[point] = search_id
+                cost[point] = point_cost
+                parent[point] = cell
+                point_distance = steps_to_target(point_x - target_x, point_y - target_y)
+                heapq.heappush(
+                    heap,
+                    (point_cost + point_distance, point_distance, point),
+                )
 
+        self.expanded_nodes = expanded
         raise NotFindPathError(f"Path not find from {current_point} to {target_point}")
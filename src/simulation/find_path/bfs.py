@@ -1,37 +1,81 @@
+from collections import deque
 from typing import override
 
 from simulation.exceptions import NotFindPathError
-from simulation.points import Point, get_closest_points, is_closest_point
+from simulation.find_path.buffers import SearchBuffers, get_search_square
+from simulation.find_path.neighbours import (
+    SIX_NEIGHBOURS,
+    UNKNOWN,
+    Topology,
+    get_neighbour_table,
+)
+from simulation.points import Point
 from simulation.turns.move import FindPathStrategy
 from simulation.world import World
 
 
 class BfsFindPathStrategy(FindPathStrategy):
+    def __init__(self, topology: Topology = SIX_NEIGHBOURS) -> None:
+        self._topology = topology
+        self._buffers = SearchBuffers()
+        self.expanded_nodes = 0
+
     @override
     def __call__(
         self,
         current_point: Point,
         target_point: Point,
         world: World,
+        max_distance: int | None = None,
     ) -> list[Point]:
-        checked_point: set[Point] = set()
+        width = world.width
+        hight = world.hight
+        cells = world.cells
+        table = get_neighbour_table(world, self._topology)
+        masks = table.masks
+        steps = table.steps
+        buffers = self._buffers
+        search_id = buffers.start(width * hight)
+        opened = buffers.opened
+        parent = buffers.parent
 
-        check_q: list[tuple[Point, list[Point]]] = [(current_point, [])]
+        start_x, start_y = current_point.x, current_point.y
+        target_x, target_y = target_point.x, target_point.y
+        min_x, max_x, min_y, max_y = get_search_square(
+            current_point, world, max_distance
+        )
 
-        for check_point, path in check_q:
-            if check_point in checked_point:
-                continue
+        start = start_y * width + start_x
+        opened[start] = search_id
+        check_q = deque([start])
+        expanded = 0
 
-            if is_closest_point(check_point, target_point):
-                return [*path, check_point]
+        while check_q:
+            cell = check_q.popleft()
+            expanded += 1
+            y, x = divmod(cell, width)
+            if abs(x - target_x) <= 1 and abs(y - target_y) <= 1:
+                self.expanded_nodes = expanded
+                return buffers.build_path(start, cell, width)
 
-            checked_point.add(check_point)
-            closest_points = get_closest_points(check_point, radius=1)
+            # Neighbours of the cells inside the square are inside it too
+            on_border = not (min_x < x < max_x and min_y < y < max_y)
+            mask = masks[cell]
+            if mask == UNKNOWN:
+                mask = table.update(cell)
+            for step, dx, dy in steps[mask]:
+                point = cell + step
+                if cells[point] is not None or opened[point] == search_id:
+                    continue
 
-            for point in closest_points:
-                if point not in world or world.is_used(point):
+                if on_border and not (
+                    min_x <= x + dx <= max_x and min_y <= y + dy <= max_y
+                ):
                     continue
 
-                check_q.append((point, [*path, check_point]))
+                opened[point] = search_id
+                parent[point] = cell
+                check_q.append(point)
 
+        self.expanded_nodes = expanded
         raise NotFindPathError(f"Path not find from {current_point} to {target_point}")
@@ -0,0 +1,177 @@
+from typing import override
+
+from simulation.exceptions import NotFindPathError
+from simulation.find_path.buffers import SearchBuffers, get_search_square
+from simulation.find_path.neighbours import (
+    SIX_NEIGHBOURS,
+    UNKNOWN,
+    Topology,
+    get_neighbour_table,
+)
+from simulation.points import Point, from_cell, to_cell
+from simulation.turns.move import FindPathStrategy
+from simulation.world import World
+
+# Cells around a target from which it can be reached: the cell itself and
+# the eight cells next to it (see is_closest_point)
+TARGET_AREA = tuple((dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1))
+
+
+class BidirectionalFindPathStrategy(FindPathStrategy):
+    """BFS from the current point and from the cells next to the target
+    at the same time, a whole layer of the smaller side at a time.
+
+    Both sides go about half as deep as one BFS, and a target walled in
+    is found unreachable as soon as the side around it runs out of cells.
+    """
+
+    def __init__(self, topology: Topology = SIX_NEIGHBOURS) -> None:
+        self._topology = topology
+        self._buffers = SearchBuffers()
+        self.expanded_nodes = 0
+
+    @override
+    def __call__(
+        self,
+        current_point: Point,
+        target_point: Point,
+        world: World,
+        max_distance: int | None = None,
+    ) -> list[Point]:
+        width = world.width
+        cells = world.cells
+        buffers = self._buffers
+        # The sides mark their cells in the same buffers with their own ids,
+        # cost is the number of steps from the start of the side
+        forward_id = buffers.start(width * world.hight)
+        backward_id = buffers.start(width * world.hight)
+        opened = buffers.opened
+        cost = buffers.cost
+
+        target_x, target_y = target_point
+        if (
+            abs(current_point.x - target_x) <= 1
+            and abs(current_point.y - target_y) <= 1
+        ):
+            self.expanded_nodes = 0
+            return [current_point]
+
+        square = get_search_square(current_point, world, max_distance)
+        min_x, max_x, min_y, max_y = square
+
+        start = to_cell(current_point, width)
+        opened[start] = forward_id
+        cost[start] = 0
+        forward = [start]
+        backward = []
+        for dx, dy in TARGET_AREA:
+            x = target_x + dx
+            y = target_y + dy
+            if not (min_x <= x <= max_x and min_y <= y <= max_y):
+                continue
+            cell = y * width + x
+            if cells[cell] is None:
+                opened[cell] = backward_id
+                cost[cell] = 0
+                backward.append(cell)
+        expanded = 0
+
+        while forward and backward:
+            if len(forward) <= len(backward):
+                expanded += len(forward)
+                forward, meeting = self._expand(
+                    forward, forward_id, backward_id, world, square
+                )
+                if meeting is not None:
+                    self.expanded_nodes = expanded
+                    return self._build_path(start, *meeting, width)
+            else:
+                expanded += len(backward)
+                backward, meeting = self._expand(
+                    backward, backward_id, forward_id, world, square
+                )
+                if meeting is not None:
+                    self.expanded_nodes = expanded
+                    backward_end, forward_end = meeting
+                    return self._build_path(start, forward_end, backward_end, width)
+
+        self.expanded_nodes = expanded
+        raise NotFindPathError(f"Path not find from {current_point} to {target_point}")
+
+    def _expand(
+        self,
+        layer: list[int],
+        side_id: int,
+        other_id: int,
+        world: World,
+        square: tuple[int, int, int, int],
+    ) -> tuple[list[int], tuple[int, int] | None]:
+        """Next layer of the side and the cells of the side and of the other
+        side on the shortest path through the layer, if the sides met.
+
+        A cell of the other side next to the layer is in its last layer
+        (otherwise the other side would have reached the cell of the layer
+        first), so every meeting is on a shortest path and the expansion
+        stops at the first one.
+        """
+        width = world.width
+        cells = world.cells
+        table = get_neighbour_table(world, self._topology)
+        masks = table.masks
+        steps = table.steps
+        opened = self._buffers.opened
+        cost = self._buffers.cost
+        parent = self._buffers.parent
+        min_x, max_x, min_y, max_y = square
+
+        next_layer: list[int] = []
+        for cell in layer:
+            y, x = divmod(cell, width)
+            # Neighbours of the cells inside the square are inside it too
+            on_border = not (min_x < x < max_x and min_y < y < max_y)
+            mask = masks[cell]
+            if mask == UNKNOWN:
+                mask = table.update(cell)
+            for step, dx, dy in steps[mask]:
+                point = cell + step
+                mark = opened[point]
+                if mark == side_id:
+                    continue
+
+                if on_border and not (
+                    min_x <= x + dx <= max_x and min_y <= y + dy <= max_y
+                ):
+                    continue
+
+                # Checked before the cell is free, the start is taken
+                if mark == other_id:
+                    return next_layer, (cell, point)
+
+                if cells[point] is not None:
+                    continue
+
+                opened[point] = side_id
+                cost[point] = cost[cell] + 1
+                parent[point] = cell
+                next_layer.append(point)
+
+        return next_layer, None
+
+    def _build_path(
+        self,
+        start: int,
+        forward_end: int,
+        backward_end: int,
+        width: int,
+    ) -> list[Point]:
+        """Path from the start to forward_end, then back along the parents
+        of the backward side to the cell next to the target"""
+        path = self._buffers.build_path(start, forward_end, width)
+        cost = self._buffers.cost
+        parent = self._buffers.parent
+        cell = backward_end
+        path.append(from_cell(cell, width))
+        while cost[cell]:
+            cell = parent[cell]
+            path.append(from_cell(cell, width))
+        return path
@@ -0,0 +1,56 @@
+from simulation.points import Point, from_cell
+from simulation.world import World
+
+
+class SearchBuffers:
+    """Per-cell search state reused between searches.
+
+    Cells are encoded as y * width + x. Instead of clearing the buffers before
+    every search, each search gets a new id and a cell is considered opened or
+    closed only if it is marked with the id of the current search.
+    """
+
+    def __init__(self) -> None:
+        self.search_id = 0
+        self.opened: list[int] = []
+        self.closed: list[int] = []
+        self.cost: list[int] = []
+        self.parent: list[int] = []
+
+    def start(self, size: int) -> int:
+        """Prepare buffers for a search over size cells and return its id"""
+        if len(self.opened) != size:
+            self.search_id = 0
+            self.opened = [0] * size
+            self.closed = [0] * size
+            self.cost = [0] * size
+            self.parent = [0] * size
+
+        self.search_id += 1
+        return self.search_id
+
+    def build_path(self, start: int, end: int, width: int) -> list[Point]:
+        """Restore the path from start to end by following parent cells"""
+        parent = self.parent
+        cells = [end]
+        while end != start:
+            end = parent[end]
+            cells.append(end)
+
+        return [from_cell(cell, width) for cell in reversed(cells)]
+
+
+def get_search_square(
+    current_point: Point,
+    world: World,
+    max_distance: int | None,
+) -> tuple[int, int, int, int]:
+    """min_x, max_x, min_y, max_y of the cells a search can visit"""
+    if max_distance is None:
+        return 0, world.width - 1, 0, world.hight - 1
+    return (
+        max(current_point.x - max_distance, 0),
+        min(current_point.x + max_distance, world.width - 1),
+        max(current_point.y - max_distance, 0),
+        min(current_point.y + max_distance, world.hight - 1),
+    )
@@ -0,0 +1,187 @@
+from collections import deque
+from typing import NamedTuple, override
+
+from simulation.entities import Creature, Entity
+from simulation.find_path.buffers import SearchBuffers, get_search_square
+from simulation.find_path.neighbours import (
+    SIX_NEIGHBOURS,
+    UNKNOWN,
+    Topology,
+    get_neighbour_table,
+)
+from simulation.points import Point, is_closest_point, to_cell
+from simulation.turns.move import FindPathStrategy, PathCache
+from simulation.world import World, WorldObserver
+
+# Half of the side of the square a detour around taken cells is searched in
+REPAIR_RADIUS = 3
+
+
+class PlannedPath(NamedTuple):
+    target: Point
+    path: list[Point]
+
+
+class LocalRepairPathCache(PathCache, WorldObserver):
+    """Keeps the path of every creature between its turns.
+
+    While the target of a creature stays at the same point, the creature
+    follows its path from the point it is at, the cells of the path are
+    only checked to be free. If some of them were taken, the path is
+    repaired: a BFS looks for a detour from the cell before the taken ones
+    back to the path in the square of REPAIR_RADIUS. The full search is
+    made only for a new target, or if there is no detour. Followed and
+    repaired paths are not always the shortest ones.
+    """
+
+    def __init__(
+        self,
+        find_path: FindPathStrategy,
+        topology: Topology = SIX_NEIGHBOURS,
+    ) -> None:
+        self._find_path = find_path
+        self._topology = topology
+        self._buffers = SearchBuffers()
+        self._world: World | None = None
+        self._paths: dict[Creature, PlannedPath] = {}
+
+    @override
+    def __call__(
+        self,
+        creature: Creature,
+        current_point: Point,
+        target_point: Point,
+        world: World,
+        max_distance: int | None = None,
+    ) -> list[Point]:
+        if world is not self._world:
+            # Paths restored from a snapshot are kept for the first world
+            if self._world is not None:
+                self._world.unsubscribe(self)
+                self._paths = {}
+            world.subscribe(self)
+            self._world = world
+
+        path = None
+        planned = self._paths.get(creature)
+        # The target may have moved, but still be next to the end of the path
+        if planned is not None and (
+            planned.target == target_point
+            or is_closest_point(planned.path[-1], target_point)
+        ):
+            path = self._follow(planned.path, current_point, world)
+
+        if path is None:
+            path = self._find_path(current_point, target_point, world, max_distance)
+
+        self._paths[creature] = PlannedPath(target_point, path)
+        return path
+
+    def get(self, creature: Creature) -> PlannedPath | None:
+        return self._paths.get(creature)
+
+    def set(self, creature: Creature, planned: PlannedPath) -> None:
+        self._paths[creature] = planned
+
+    def clear(self) -> None:
+        self._paths = {}
+
+    @override
+    def on_remove(self, point: Point, entity: Entity) -> None:
+        if isinstance(entity, Creature):
+            self._paths.pop(entity, None)
+
+    @override
+    def on_reset(self) -> None:
+        self.clear()
+
+    def _follow(
+        self,
+        path: list[Point],
+        current_point: Point,
+        world: World,
+    ) -> list[Point] | None:
+        """Rest of the path from the current point, repaired if needed,
+        None if the creature left the path or there is no detour"""
+        try:
+            path = path[path.index(current_point) :]
+        except ValueError:
+            return None
+
+        width = world.width
+        cells = world.cells
+        index = 1
+        while index < len(path):
+            point = path[index]
+            if cells[point.y * width + point.x] is None:
+                index += 1
+                continue
+
+            repaired_path = self._find_detour(path, index, world)
+            if repaired_path is None:
+                return None
+            path = repaired_path
+        return path
+
+    def _find_detour(
+        self,
+        path: list[Point],
+        taken: int,
+        world: World,
+    ) -> list[Point] | None:
+        """Path with the taken cell and the cells after it replaced
+        by a detour to the nearest free cell of the path"""
+        width = world.width
+        cells = world.cells
+        rejoin = {
+            cell: index
+            for index in range(taken + 1, len(path))
+            if cells[cell := to_cell(path[index], width)] is None
+        }
+        if not rejoin:
+            return None
+
+        table = get_neighbour_table(world, self._topology)
+        masks = table.masks
+        steps = table.steps
+        buffers = self._buffers
+        search_id = buffers.start(len(cells))
+        opened = buffers.opened
+        parent = buffers.parent
+
+        # The detour does not go through the cells of the path before it,
+        # so the creature never finds itself on the path twice
+        for path_point in path[:taken]:
+            opened[to_cell(path_point, width)] = search_id
+
+        start_point = path[taken - 1]
+        min_x, max_x, min_y, max_y = get_search_square(
+            start_point, world, REPAIR_RADIUS
+        )
+        start = to_cell(start_point, width)
+        check_q = deque([start])
+
+        while check_q:
+            cell = check_q.popleft()
+            y, x = divmod(cell, width)
+            mask = masks[cell]
+            if mask == UNKNOWN:
+                mask = table.update(cell)
+            for step, dx, dy in steps[mask]:
+                point = cell + step
+                if cells[point] is not None or opened[point] == search_id:
+                    continue
+
+                if not (min_x <= x + dx <= max_x and min_y <= y + dy <= max_y):
+                    continue
+
+                opened[point] = search_id
+                parent[point] = cell
+                index = rejoin.get(point)
+                if index is not None:
+                    detour = buffers.build_path(start, point, width)
+                    return path[: taken - 1] + detour + path[index + 1 :]
+
+                check_q.append(point)
+
+        return None
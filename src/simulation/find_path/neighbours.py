@@ -0,0 +1,148 @@
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import override
+from weakref import WeakKeyDictionary
+
+from simulation.entities import Entity, StaticEntity
+from simulation.points import Point
+from simulation.world import World, WorldObserver
+
+
+@dataclass(frozen=True)
+class Topology:
+    """Cells a creature can step to and the matching heuristic.
+
+    steps_to_target(dx, dy) is the least number of steps from a cell to
+    the cells next to a target dx, dy away (see is_closest_point), so it is
+    0 at the target.
+    """
+
+    name: str
+    offsets: tuple[tuple[int, int], ...]
+    steps_to_target: Callable[[int, int], int]
+
+
+def _steps_to_target_four(dx: int, dy: int) -> int:
+    return max(abs(dx) - 1, 0) + max(abs(dy) - 1, 0)
+
+
+def _steps_to_target_six(dx: int, dy: int) -> int:
+    # The cells next to the target are the target moved by at most 1 along
+    # each axis, the diagonal step moves along both axes only if they
+    # have the same sign
+    dx -= (dx > 0) - (dx < 0)
+    dy -= (dy > 0) - (dy < 0)
+    if dx * dy >= 0:
+        return max(abs(dx), abs(dy))
+    return abs(dx) + abs(dy)
+
+
+def _steps_to_target_eight(dx: int, dy: int) -> int:
+    return max(abs(dx), abs(dy), 1) - 1
+
+
+FOUR_NEIGHBOURS = Topology(
+    "four",
+    ((-1, 0), (1, 0), (0, 1), (0, -1)),
+    _steps_to_target_four,
+)
+# The same as get_closest_points(radius=1)
+SIX_NEIGHBOURS = Topology(
+    "six",
+    ((-1, 0), (1, 0), (0, 1), (0, -1), (-1, -1), (1, 1)),
+    _steps_to_target_six,
+)
+EIGHT_NEIGHBOURS = Topology(
+    "eight",
+    ((-1, 0), (1, 0), (0, 1), (0, -1), (-1, -1), (1, 1), (1, -1), (-1, 1)),
+    _steps_to_target_eight,
+)
+
+# Mask of a cell not reached by a search yet, masks have at most 8 bits
+UNKNOWN = 0xFFFF
+
+
+class NeighbourTable(WorldObserver):
+    """Neighbours of every cell of a world in a topology.
+
+    masks[cell] has the bit i set if the cell + offsets[i] is inside
+    the world and not taken by a static entity, steps[mask] are the steps
+    (cell delta, dx, dy) of the bits of the mask, shared by all cells with
+    the same mask. A mask is UNKNOWN until a search reaches the cell and
+    calls update, the masks around a static entity are reset when it is
+    added or removed, so searches only check cells taken by the other
+    entities.
+    """
+
+    def __init__(self, world: World, topology: Topology) -> None:
+        width = world.width
+        self._width = width
+        self._hight = world.hight
+        # Not the world itself, so the world is not kept alive by the cache
+        self._cells = world.cells
+        self._offsets = topology.offsets
+        self.steps = tuple(
+            tuple(
+                (dy * width + dx, dx, dy)
+                for bit, (dx, dy) in enumerate(topology.offsets)
+                if mask & (1 << bit)
+            )
+            for mask in range(1 << len(topology.offsets))
+        )
+        self.masks = array("H", [UNKNOWN]) * (width * world.hight)
+        world.subscribe(self)
+
+    def update(self, cell: int) -> int:
+        """Compute the mask of the cell"""
+        width = self._width
+        hight = self._hight
+        cells = self._cells
+        y, x = divmod(cell, width)
+        mask = 0
+        for bit, (step, dx, dy) in enumerate(self.steps[-1]):
+            if not (0 <= x + dx < width and 0 <= y + dy < hight):
+                continue
+
+            entity = cells[cell + step]
+            if entity is None or not isinstance(entity, StaticEntity):
+                mask |= 1 << bit
+        self.masks[cell] = mask
+        return mask
+
+    @override
+    def on_add(self, point: Point, entity: Entity) -> None:
+        if isinstance(entity, StaticEntity):
+            self._reset(point)
+
+    @override
+    def on_remove(self, point: Point, entity: Entity) -> None:
+        if isinstance(entity, StaticEntity):
+            self._reset(point)
+
+    @override
+    def on_reset(self) -> None:
+        self.masks[:] = array("H", [UNKNOWN]) * len(self.masks)
+
+    def _reset(self, point: Point) -> None:
+        """Reset the masks of the cells leading to the point"""
+        masks = self.masks
+        for dx, dy in self._offsets:
+            x = point.x - dx
+            y = point.y - dy
+            if 0 <= x < self._width and 0 <= y < self._hight:
+                masks[y * self._width + x] = UNKNOWN
+
+
+_tables: WeakKeyDictionary[World, dict[Topology, NeighbourTable]] = WeakKeyDictionary()
+
+
+def get_neighbour_table(world: World, topology: Topology) -> NeighbourTable:
+    """Table of the world shared by all searches in the topology,
+    built on the first search"""
+    tables = _tables.setdefault(world, {})
+    table = tables.get(topology)
+    if table is None:
+        table = NeighbourTable(world, topology)
+        tables[topology] = table
+    return table
@@ -0,0 +1,36 @@
+from typing import override
+
+from simulation.exceptions import NotFindPathError
+from simulation.points import Point
+from simulation.profiling import Profiler
+from simulation.turns.move import FindPathStrategy
+from simulation.world import World
+
+
+class ProfiledFindPathStrategy(FindPathStrategy):
+    """Counts the searches of the strategy, the failed ones
+    and the nodes they expanded"""
+
+    def __init__(self, find_path: FindPathStrategy, profiler: Profiler) -> None:
+        self._find_path = find_path
+        self._profiler = profiler
+        self.expanded_nodes = 0
+
+    @override
+    def __call__(
+        self,
+        current_point: Point,
+        target_point: Point,
+        world: World,
+        max_distance: int | None = None,
+    ) -> list[Point]:
+        profiler = self._profiler
+        profiler.count("path.searches")
+        try:
+            return self._find_path(current_point, target_point, world, max_distance)
+        except NotFindPathError:
+            profiler.count("path.failed")
+            raise
+        finally:
+            self.expanded_nodes = self._find_path.expanded_nodes
+            profiler.count("path.expanded", self.expanded_nodes)
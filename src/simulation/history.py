@@ -0,0 +1,231 @@
+from array import array
+from collections import deque
+from typing import override
+
+from simulation.entities import Creature, Entity
+from simulation.points import Point, from_cell, to_cell
+from simulation.world import World, WorldObserver
+
+ADD = 0
+MOVE = 1
+REMOVE = 2
+HP = 3
+
+# Bytes of one change in the log: kind, entity id and two values
+CHANGE_SIZE = 13
+INITIAL_CAPACITY = 1024
+
+
+class History(WorldObserver):
+    """Log of the changes of the world made during the last turns.
+
+    A change is a row of its kind, the entity id and two values (the cells
+    of a move, the cell of an addition or a removal, hp before and after)
+    in arrays used as a ring buffer. When the turn or the memory budget is
+    exceeded the oldest turns are dropped. A turn is undone by applying its
+    changes in reverse, entities are kept by the log only while it has
+    changes of them.
+
+    Undo restores the cells and hp, not the states of the random streams
+    and not the order the entities were added in: an entity removed during
+    the turn comes back as the latest one. So the world after undo is not
+    enough to resume the run, turns made from it differ from the turns
+    made before. Engine resumes from a keyframe instead (see Keyframes).
+    """
+
+    def __init__(
+        self,
+        world: World,
+        max_turns: int | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self._world = world
+        self._max_turns = max_turns
+        self._max_changes = None
+        if max_bytes is not None:
+            self._max_changes = max(max_bytes // CHANGE_SIZE, 1)
+
+        capacity = INITIAL_CAPACITY
+        if self._max_changes is not None:
+            capacity = min(capacity, self._max_changes)
+        self._kinds = array("B", [0]) * capacity
+        self._entity_ids = array("i", [0]) * capacity
+        self._values = array("i", [0]) * capacity
+        self._other_values = array("i", [0]) * capacity
+
+        # Changes are numbered in the order they were made,
+        # change n is stored at index (n - base) % capacity
+        self._base = 0
+        self._first = 0
+        self._end = 0
+        # Number of the first change of every turn in the log
+        self._turn_starts: deque[int] = deque()
+        self._recording = False
+        self._overflowed = False
+
+        self._entities: list[Entity | None] = []
+        self._ids: dict[Entity, int] = {}
+        self._references: list[int] = []
+        self._free_ids: list[int] = []
+
+        world.subscribe(self)
+
+    def __len__(self) -> int:
+        """Number of turns that can be undone"""
+        turns = len(self._turn_starts)
+        if self._recording and not self._overflowed:
+            turns -= 1
+        return turns
+
+    def start_turn(self) -> None:
+        self._recording = True
+        self._overflowed = False
+        self._turn_starts.append(self._end)
+
+    def end_turn(self) -> None:
+        self._recording = False
+        if self._max_turns is not None:
+            while len(self._turn_starts) > self._max_turns:
+                self._drop_oldest_turn()
+
+    def undo_turn(self) -> bool:
+        """Apply changes of the last turn in reverse,
+        False if there is no turn in the log"""
+        if self._recording or not self._turn_starts:
+            return False
+
+        world = self._world
+        width = world.width
+        start = self._turn_starts.pop()
+        for number in range(self._end - 1, start - 1, -1):
+            index = (number - self._base) % len(self._kinds)
+            entity_id = self._entity_ids[index]
+            entity = self._entities[entity_id]
+            if entity is None:
+                continue
+
+            kind = self._kinds[index]
+            if kind == HP:
+                if isinstance(entity, Creature):
+                    world.set_hp(entity, self._values[index])
+            else:
+                point = from_cell(self._values[index], width)
+                if kind == ADD:
+                    world.remove_at(point)
+                else:
+                    world.add(point, entity)
+
+            self._release(entity_id)
+
+        self._end = start
+        return True
+
+    def clear(self) -> None:
+        while self._turn_starts:
+            self._drop_oldest_turn()
+
+    @override
+    def on_add(self, point: Point, entity: Entity) -> None:
+        if self._recording:
+            self._record(ADD, entity, self._cell(point), 0)
+
+    @override
+    def on_move(self, from_point: Point, to_point: Point, entity: Entity) -> None:
+        if self._recording:
+            self._record(MOVE, entity, self._cell(from_point), self._cell(to_point))
+
+    @override
+    def on_remove(self, point: Point, entity: Entity) -> None:
+        if self._recording:
+            self._record(REMOVE, entity, self._cell(point), 0)
+
+    @override
+    def on_hp_change(self, creature: Creature, old_hp: int, hp: int) -> None:
+        if self._recording:
+            self._record(HP, creature, old_hp, hp)
+
+    @override
+    def on_reset(self) -> None:
+        # The changes are of the entities that are not in the world anymore
+        self.clear()
+
+    def _record(self, kind: int, entity: Entity, value: int, other_value: int) -> None:
+        if self._overflowed:
+            return
+
+        if self._end - self._first == len(self._kinds) and not self._reserve():
+            # The turn does not fit into the budget, so it can not be undone
+            # and the turns before it can not be undone either
+            self.clear()
+            self._overflowed = True
+            return
+
+        index = (self._end - self._base) % len(self._kinds)
+        self._kinds[index] = kind
+        self._entity_ids[index] = self._acquire(entity)
+        self._values[index] = value
+        self._other_values[index] = other_value
+        self._end += 1
+
+    def _reserve(self) -> bool:
+        """Make room for a change of the current turn, False if the turn
+        already takes the whole budget"""
+        capacity = len(self._kinds)
+        if self._max_changes is None or capacity < self._max_changes:
+            new_capacity = capacity * 2
+            if self._max_changes is not None:
+                new_capacity = min(new_capacity, self._max_changes)
+            self._grow(new_capacity)
+            return True
+
+        if len(self._turn_starts) <= 1:
+            return False
+
+        self._drop_oldest_turn()
+        return True
+
+    def _grow(self, capacity: int) -> None:
+        """Reallocate the arrays with the oldest change at index 0"""
+        start = (self._first - self._base) % len(self._kinds)
+        for name in ("_kinds", "_entity_ids", "_values", "_other_values"):
+            column: array[int] = getattr(self, name)
+            grown = column[start:] + column[:start]
+            grown.extend(array(column.typecode, [0]) * (capacity - len(column)))
+            setattr(self, name, grown)
+        self._base = self._first
+
+    def _drop_oldest_turn(self) -> None:
+        self._turn_starts.popleft()
+        end = self._turn_starts[0] if self._turn_starts else self._end
+        capacity = len(self._kinds)
+        for number in range(self._first, end):
+            self._release(self._entity_ids[(number - self._base) % capacity])
+
+        self._first = end
+
+    def _acquire(self, entity: Entity) -> int:
+        entity_id = self._ids.get(entity)
+        if entity_id is None:
+            if self._free_ids:
+                entity_id = self._free_ids.pop()
+                self._entities[entity_id] = entity
+            else:
+                entity_id = len(self._entities)
+                self._entities.append(entity)
+                self._references.append(0)
+            self._ids[entity] = entity_id
+
+        self._references[entity_id] += 1
+        return entity_id
+
+    def _release(self, entity_id: int) -> None:
+        self._references[entity_id] -= 1
+        if self._references[entity_id] == 0:
+            entity = self._entities[entity_id]
+            if entity is not None:
+                del self._ids[entity]
+            self._entities[entity_id] = None
+            self._free_ids.append(entity_id)
+
+    def _cell(self, point: Point) -> int:
+        return to_cell(point, self._world.width)
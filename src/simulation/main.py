@@ -1,109 +1,224 @@
+import argparse
+import json
+import sys
+import time
 from pathlib import Path
 from threading import Thread
 
 from simulation import Simulation
-from simulation.actions import (
-    Action,
-    IntervalAction,
-    Spawn,
-    TurnAction,
-    TurnMap,
-)
-from simulation.config import load_config
-from simulation.entities import Entity, Grass, Herbivore, Predator, Rock, Tree
-from simulation.factories import (
-    GrassFactory,
-    HerbivoreFactory,
-    PredatorFactory,
-    RockFactory,
-    TreeFactory,
-)
-from simulation.find_path import (
-    AStarFindPathStrategy,
+from simulation.builder import (
+    create_engine,
+    create_renderer,
+    get_default_config_path,
 )
+from simulation.config import Config, load_config, read_config_data
 from simulation.presentation.controler import Controler
-from simulation.presentation.renderer import Renderer
-from simulation.presentation.state import State
-from simulation.turns import Attack, Eat, Move, Starve
-from simulation.world import World
+from simulation.presentation.render_loop import RenderLoop
+from simulation.profiling import Profiler
+from simulation.stats import STATS_COLUMNS, StatsWriter, TurnStats
+from simulation.sweep import load_sweep_config, run_sweep
+
+# Path of the stats option meaning stdout
+STDOUT = Path("-")
 
 
 def main() -> None:
-    try:
-        config = load_config(Path("config.toml"))
-    except FileNotFoundError:
-        config = load_config(Path("config.example.toml"))
-
-    entity_icon: dict[type[Entity], str] = {
-        Predator: config.icon.predator,
-        Herbivore: config.icon.herbivore,
-        Rock: config.icon.rock,
-        Grass: config.icon.grass,
-        Tree: config.icon.tree,
-    }
-    default_icon = config.icon.default
-    renderer = Renderer(entity_icon, default_icon)
-
-    eat = Eat()
-    starve = Starve(config.starve.power)
-
-    find_path_strategy = AStarFindPathStrategy()
-    move = Move(find_path_strategy)
-
-    turn_map = TurnMap()
-    turn_map.add(Predator, [starve, move, Attack(), eat])
-    turn_map.add(Herbivore, [starve, move, eat])
-
-    grass_factory = GrassFactory(config.entity.grass)
-    herbivore_factory = HerbivoreFactory(config.entity.herbivore)
-    predator_factory = PredatorFactory(config.entity.predator)
-
-    interval_config = config.spawn.interval
-    interval_spawn_actions = [
-        IntervalAction(
-            interval_config.grass.interval,
-            Spawn(
-                interval_config.grass.count,
-                grass_factory,
-            ),
-        ),
-        IntervalAction(
-            interval_config.herbivore.interval,
-            Spawn(
-                interval_config.herbivore.count,
-                herbivore_factory,
-            ),
-        ),
-        IntervalAction(
-            interval_config.predator.interval,
-            Spawn(
-                interval_config.predator.count,
-                predator_factory,
-            ),
-        ),
-    ]
-
-    turn_actions: list[Action] = [TurnAction(turn_map), *interval_spawn_actions]
-
-    tree_factory = TreeFactory()
-    rock_factory = RockFactory()
-
-    init_config = config.spawn.init
-    init_actions: list[Action] = [
-        Spawn(init_config.predator, predator_factory),
-        Spawn(init_config.tree, tree_factory),
-        Spawn(init_config.rock, rock_factory),
-        Spawn(init_config.grass, grass_factory),
-        Spawn(init_config.herbivore, herbivore_factory),
-    ]
-
-    state = State()
-
-    world = World(config.world.width, config.world.hight)
-    simulation = Simulation(world, init_actions, turn_actions, renderer, state)
-
-    thread = Thread(target=simulation.start)
-    thread.start()
-
-    controler = Controler(state)
-    controler.get_user_status_game()
+    parser = argparse.ArgumentParser(prog="simulation", description="Simulation World")
+    parser.add_argument(
+        "--config",
+        type=Path,
+        help="path to the config, config.toml or config.example.toml by default",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="seed of the random numbers, overrides the seed from the config",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        help="save timings and counters of every turn to a .csv or .json file",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser(
+        "run",
+        help="run a given number of turns at full speed and report turns/sec",
+    )
+    run_parser.add_argument("--turns", type=int, required=True)
+    run_parser.add_argument("--config", type=Path, default=argparse.SUPPRESS)
+    run_parser.add_argument("--seed", type=int, default=argparse.SUPPRESS)
+    run_parser.add_argument("--profile", type=Path, default=argparse.SUPPRESS)
+    run_parser.add_argument(
+        "--no-render",
+        action="store_true",
+        help="do not render the world after every turn",
+    )
+    run_parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        help="path to save the checkpoint to after the run",
+    )
+    run_parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        help="save the checkpoint every given number of turns as well",
+    )
+    run_parser.add_argument(
+        "--stats",
+        type=Path,
+        help="stream population, births, deaths, mean hp and duration of every"
+        " turn to a .ndjson, .jsonl or .csv file, - for NDJSON to stdout",
+    )
+    run_parser.add_argument(
+        "--resume",
+        type=Path,
+        help="continue the run from the checkpoint",
+    )
+
+    sweep_parser = subparsers.add_parser(
+        "sweep",
+        help="run variants of the config in parallel and summarize them as JSON",
+    )
+    sweep_parser.add_argument("sweep", type=Path, help="path to the sweep config")
+    sweep_parser.add_argument("--config", type=Path, default=argparse.SUPPRESS)
+    sweep_parser.add_argument(
+        "--seed",
+        type=int,
+        default=argparse.SUPPRESS,
+        help="overrides the seed from the sweep config",
+    )
+    sweep_parser.add_argument(
+        "--jobs",
+        type=int,
+        help="number of worker processes, the number of CPUs by default",
+    )
+    sweep_parser.add_argument(
+        "--output",
+        type=Path,
+        help="path to the summary, printed by default",
+    )
+
+    args = parser.parse_args()
+    config_path = get_default_config_path() if args.config is None else args.config
+
+    if args.command == "sweep":
+        sweep(config_path, args.sweep, args.seed, args.jobs, args.output)
+        return
+
+    config = load_config(config_path)
+    if args.seed is not None:
+        config.seed = args.seed
+
+    if args.command == "run":
+        run(
+            config,
+            args.turns,
+            render=not args.no_render,
+            checkpoint=args.checkpoint,
+            checkpoint_interval=args.checkpoint_interval,
+            resume=args.resume,
+            profile=args.profile,
+            stats=args.stats,
+        )
+    else:
+        interact(config, args.profile)
+
+
+def interact(config: Config, profile: Path | None = None) -> None:
+    profiler = None if profile is None else Profiler()
+    simulation = Simulation(
+        create_engine(config, profiler=profiler),
+        create_renderer(config),
+        fps=config.render.fps,
+        turn_interval=config.render.turn_interval,
+        profiler=profiler,
+    )
+
+    controler = Controler(simulation.send)
+    Thread(target=controler.get_user_status_game, daemon=True).start()
+    simulation.start()
+
+    if profile is not None and profiler is not None:
+        profiler.save(profile)
+
+
+def run(  # noqa: PLR0913
+    config: Config,
+    turns: int,
+    *,
+    render: bool,
+    checkpoint: Path | None = None,
+    checkpoint_interval: int | None = None,
+    resume: Path | None = None,
+    profile: Path | None = None,
+    stats: Path | None = None,
+) -> None:
+    profiler = None if profile is None else Profiler()
+    stats_writer = create_stats_writer(stats)
+    turn_stats = None if stats_writer is None else TurnStats(stats_writer)
+    engine = create_engine(
+        config, keep_history=False, profiler=profiler, stats=turn_stats
+    )
+    if resume is not None:
+        engine.load_checkpoint(resume)
+    render_loop = None
+    if render:
+        render_loop = RenderLoop(
+            create_renderer(config), engine.world, config.render.fps, profiler
+        )
+        render_loop.start(engine.turn_number)
+
+    start = time.perf_counter()
+    for turn in range(1, turns + 1):
+        engine.step()
+        if render_loop is not None:
+            render_loop.publish(engine.turn_number)
+        if (
+            checkpoint is not None
+            and checkpoint_interval is not None
+            and turn % checkpoint_interval == 0
+        ):
+            engine.save_checkpoint(checkpoint)
+    duration = time.perf_counter() - start
+    if render_loop is not None:
+        render_loop.stop()
+
+    if checkpoint is not None:
+        engine.save_checkpoint(checkpoint)
+    if profile is not None and profiler is not None:
+        profiler.save(profile)
+    if stats_writer is not None:
+        stats_writer.close()
+
+    turns_per_second = turns / duration if duration else float("inf")
+    print(
+        f"Simulated {turns} turns in {duration:.3f} s: {turns_per_second:.1f} turns/s",
+        # Not mixed with the stats
+        file=sys.stderr if stats == STDOUT else sys.stdout,
+    )
+
+
+def create_stats_writer(path: Path | None) -> StatsWriter | None:
+    if path is None:
+        return None
+    return StatsWriter(None if path == STDOUT else path, STATS_COLUMNS)
+
+
+def sweep(
+    config_path: Path,
+    sweep_path: Path,
+    seed: int | None,
+    jobs: int | None,
+    output: Path | None,
+) -> None:
+    sweep_config = load_sweep_config(sweep_path)
+    if seed is not None:
+        sweep_config.seed = seed
+
+    summary = run_sweep(sweep_config, read_config_data(config_path), jobs)
+    if output is None:
+        print(json.dumps(summary))
+    else:
+        with output.open("w") as f:
+            json.dump(summary, f, indent=2)
@@ -1,54 +1,36 @@
-from dataclasses import dataclass
+from functools import cache
+from typing import NamedTuple
 
-from simulation.entities import Entity, Target
 
+class Point(NamedTuple):
+    """Point of the world, a tuple: hashed and compared in C, no __dict__"""
 
-@dataclass(frozen=True, order=True)
-class Point:
     x: int
     y: int
 
 
-def find_near_entity[T: Entity](
-    current_point: Point,
-    entities_position: list[tuple[Point, T]],
-) -> tuple[T, Point] | None:
-    for point, entity in entities_position:
-        if is_closest_point(current_point, point):
-            return entity, point
+def to_cell(point: Point, width: int) -> int:
+    """Index of the point in the cells of a world of the width"""
+    return point.y * width + point.x
 
-    return None
 
+def from_cell(cell: int, width: int) -> Point:
+    y, x = divmod(cell, width)
+    return Point(x, y)
 
-def find_closest_point_entity(
-    current_point: Point,
-    entitys_position: list[tuple[Point, Target]],
-    max_path: float = float("inf"),
-) -> Point | None:
-    result_point = None
-    for point, _ in entitys_position:
-        y_distance = abs(point.y - current_point.y)
-        x_distance = abs(point.x - current_point.x)
-        current_path = y_distance + x_distance
-        if max_path > current_path:
-            max_path = current_path
-            result_point = point
 
-    return result_point
+@cache
+def get_closest_offsets(radius: int) -> tuple[tuple[int, int], ...]:
+    """Offsets of get_closest_points, in the same order"""
+    offsets: list[tuple[int, int]] = []
+    for i in range(1, radius + 1):
+        offsets.extend(((-i, 0), (i, 0), (0, i), (0, -i), (-i, -i), (i, i)))
+    return tuple(offsets)
 
 
 def get_closest_points(current: Point, radius: int) -> list[Point]:
-    closest_points: list[Point] = []
-
-    for i in range(1, radius + 1):
-        closest_points.append(Point(current.x - i, current.y))
-        closest_points.append(Point(current.x + i, current.y))
-        closest_points.append(Point(current.x, current.y + i))
-        closest_points.append(Point(current.x, current.y - i))
-        closest_points.append(Point(current.x - i, current.y - i))
-        closest_points.append(Point(current.x + i, current.y + i))
-
-    return closest_points
+    x, y = current
+    return [Point(x + dx, y + dy) for dx, dy in get_closest_offsets(radius)]
 
 
 def get_distance(current_point: Point, target_point: Point) -> int:
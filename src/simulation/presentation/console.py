@@ -1,5 +1,9 @@
 import os
 import sys
+import unicodedata
+
+CLEAR_SCREEN = "\x1b[2J"
+ERASE_LINE = "\x1b[K"
 
 
 def clear() -> None:
@@ -16,3 +20,19 @@ def clear_lines(n: int) -> None:
     for _ in range(n):
         sys.stdout.write(cursor_up)
         sys.stdout.write(erase_line)
+
+
+def move_cursor(row: int, column: int) -> str:
+    """Escape sequence moving the cursor, rows and columns start from 1"""
+    return f"\x1b[{row};{column}H"
+
+
+def get_display_width(text: str) -> int:
+    """Number of terminal columns the text takes, wide characters
+    such as emoji take two columns"""
+    width = 0
+    for char in text:
+        if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Cf"):
+            continue
+        width += 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+    return width
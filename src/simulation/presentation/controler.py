@@ -1,27 +1,35 @@
+from collections.abc import Callable
+
 from simulation.presentation.console import clear_lines
-from simulation.presentation.state import State, Status
+from simulation.presentation.state import Command, Status
 
 
 class Controler:
-    def __init__(self, state: State):
-        self._state = state
+    """Reads the commands of the user from the console and sends them
+    to the simulation, input() blocks, so it runs in its own thread"""
+
+    def __init__(self, send: Callable[[Command], None]):
+        self._send = send
 
     def get_user_status_game(self) -> None:
         try:
             self._get_status_game()
-        except KeyboardInterrupt:
-            self._state.status = Status.quit
+        except EOFError:
+            self._send(Command(Status.quit))
 
     def _get_status_game(self) -> None:
         while True:
             result = input()
             if result == "s":
-                self._state.status = Status.simulate
+                self._send(Command(Status.simulate))
             elif result == "p":
                 clear_lines(1)
-                self._state.status = Status.pause
+                self._send(Command(Status.pause))
             elif result == "q":
-                self._state.status = Status.quit
+                self._send(Command(Status.quit))
                 break
             elif result == "r":
-                self._state.status = Status.reverse
+                self._send(Command(Status.reverse))
+            elif result.startswith("g ") and result[2:].strip().isdigit():
+                clear_lines(1)
+                self._send(Command(Status.seek, int(result[2:])))
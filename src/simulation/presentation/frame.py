@@ -0,0 +1,171 @@
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Self, override
+
+from simulation.entities import Entity
+from simulation.points import Point, to_cell
+from simulation.world import World, WorldObserver
+
+# Copying a cell by its index costs about as much as copying FULL_COPY_COST
+# cells in a slice, so a frame with more stale cells is copied whole
+FULL_COPY_COST = 10
+
+
+@dataclass
+class Frame:
+    """Copy of the world taken after a turn, read by the renderer"""
+
+    turn: int = 0
+    width: int = 0
+    hight: int = 0
+    cells: list[Entity | None] = field(default_factory=list)
+    counts: dict[type[Entity], int] = field(default_factory=dict)
+    # Cells changed since the previous frame the renderer took,
+    # None if the whole frame has to be drawn
+    dirty_cells: set[int] | None = None
+
+    @classmethod
+    def from_world(cls, world: World, turn: int) -> Self:
+        return cls(
+            turn, world.width, world.hight, list(world.cells), world.get_counts()
+        )
+
+
+class FrameRecorder(WorldObserver):
+    """Keeps the changed cells of the world between frames, so a frame
+    does not need a scan of the world.
+
+    For every captured frame the cells changed since its capture are kept,
+    so only they are copied when the frame is captured again. A new frame,
+    a frame with too many changed cells and every frame after World.replace
+    get a copy of the whole world.
+    """
+
+    def __init__(self, world: World) -> None:
+        self.world = world
+        self._width = world.width
+        self._dirty_cells: set[int] | None = None
+        # Frames captured before and their stale cells,
+        # None if the whole frame has to be copied
+        self._frames: list[Frame] = []
+        self._stale_cells: list[set[int] | None] = []
+        world.subscribe(self)
+
+    def capture(self, turn: int, frame: Frame) -> None:
+        """Overwrite the frame with the current state of the world"""
+        world = self.world
+        cells = world.cells
+        dirty_cells = self._dirty_cells
+        self._dirty_cells = set()
+        max_stale = len(cells) // FULL_COPY_COST
+        stale_cells = self._stale_cells
+        for index, stale in enumerate(stale_cells):
+            if stale is None:
+                continue
+            if dirty_cells is None or len(stale) + len(dirty_cells) > max_stale:
+                stale_cells[index] = None
+            else:
+                stale.update(dirty_cells)
+
+        index = self._get_frame_index(frame)
+        frame_stale_cells = stale_cells[index]
+        if frame_stale_cells is None or len(frame.cells) != len(cells):
+            frame.cells[:] = cells
+        else:
+            frame_cells = frame.cells
+            for cell in frame_stale_cells:
+                frame_cells[cell] = cells[cell]
+        stale_cells[index] = set()
+
+        frame.turn = turn
+        frame.width = world.width
+        frame.hight = world.hight
+        frame.counts.clear()
+        frame.counts.update(world.get_counts())
+        frame.dirty_cells = dirty_cells
+
+    def close(self) -> None:
+        self.world.unsubscribe(self)
+
+    @override
+    def on_add(self, point: Point, entity: Entity) -> None:
+        self._mark(point)
+
+    @override
+    def on_move(self, from_point: Point, to_point: Point, entity: Entity) -> None:
+        self._mark(from_point)
+        self._mark(to_point)
+
+    @override
+    def on_remove(self, point: Point, entity: Entity) -> None:
+        self._mark(point)
+
+    @override
+    def on_reset(self) -> None:
+        self._dirty_cells = None
+
+    def _get_frame_index(self, frame: Frame) -> int:
+        for index, captured_frame in enumerate(self._frames):
+            if captured_frame is frame:
+                return index
+
+        self._frames.append(frame)
+        self._stale_cells.append(None)
+        return len(self._frames) - 1
+
+    def _mark(self, point: Point) -> None:
+        if self._dirty_cells is not None:
+            self._dirty_cells.add(to_cell(point, self._width))
+
+
+class FrameBuffer:
+    """Frames passed from the simulation thread to the render thread.
+
+    Triple buffering: the simulation fills the back frame and swaps it with
+    the ready one, the renderer swaps the ready frame with the front one it
+    draws, so the threads only wait for each other during a swap. A ready
+    frame replaced before the renderer took it is dropped, its changed cells
+    are carried over to the next frame.
+    """
+
+    def __init__(self, world: World) -> None:
+        self._recorder = FrameRecorder(world)
+        self._back = Frame()
+        self._ready = Frame()
+        self._front = Frame()
+        self._has_ready = False
+        self._lock = Lock()
+
+    def publish(self, turn: int) -> None:
+        """Called by the simulation after a turn"""
+        back = self._back
+        self._recorder.capture(turn, back)
+
+        with self._lock:
+            if self._has_ready:
+                dropped_cells = self._ready.dirty_cells
+                if dropped_cells is None or back.dirty_cells is None:
+                    back.dirty_cells = None
+                else:
+                    # The cells of the turn are added to the cells of all
+                    # the turns dropped since the renderer took a frame
+                    dropped_cells |= back.dirty_cells
+                    back.dirty_cells = dropped_cells
+
+            self._back = self._ready
+            self._ready = back
+            self._has_ready = True
+
+    def take(self) -> Frame | None:
+        """Called by the renderer, the latest frame or None
+        if there is no frame since the previous call"""
+        with self._lock:
+            if not self._has_ready:
+                return None
+
+            self._front, self._ready = self._ready, self._front
+            self._has_ready = False
+            return self._front
+
+    def close(self) -> None:
+        self._recorder.close()
@@ -0,0 +1,93 @@
+import time
+from collections.abc import Callable
+from queue import Empty, SimpleQueue
+from threading import Event, Thread
+
+from simulation.presentation.frame import FrameBuffer
+from simulation.presentation.renderer import Renderer
+from simulation.profiling import Profiler
+from simulation.world import World
+
+
+class RenderLoop:
+    """Renders frames of the world in its own thread at most fps times
+    a second.
+
+    The simulation publishes a frame after every turn and goes on without
+    waiting for the renderer, only the latest frame is drawn, the frames
+    published in between are dropped. All calls of the renderer are made
+    by the render thread, which sleeps until a frame is published or a call
+    is queued, so a paused simulation does not wake it.
+    """
+
+    def __init__(
+        self,
+        renderer: Renderer,
+        world: World,
+        fps: float,
+        profiler: Profiler | None = None,
+    ) -> None:
+        self._renderer = renderer
+        self._profiler = profiler
+        self._frames = FrameBuffer(world)
+        self._frame_time = 1 / fps
+        self._calls: SimpleQueue[Callable[[], None]] = SimpleQueue()
+        self._stopped = Event()
+        # Set when there is something to draw or to call
+        self._wake = Event()
+        self._thread = Thread(target=self._loop, daemon=True)
+
+    def start(self, turn: int) -> None:
+        self._renderer.clear_frame()
+        self.publish(turn)
+        self._thread.start()
+
+    def publish(self, turn: int) -> None:
+        """Called by the simulation after a turn"""
+        self._frames.publish(turn)
+        self._wake.set()
+
+    def call(self, function: Callable[[], None]) -> None:
+        """Call the function in the render thread after drawing the next frame"""
+        self._calls.put(function)
+        self._wake.set()
+
+    def stop(self) -> None:
+        """Draw the latest frame and stop the thread"""
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join()
+        self._frames.close()
+
+    def _loop(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+
+            start = time.perf_counter()
+            stopped = self._stopped.is_set()
+            self._draw()
+            if stopped:
+                break
+
+            # Frames published meanwhile wait, so there are at most fps frames
+            elapsed = time.perf_counter() - start
+            self._stopped.wait(max(self._frame_time - elapsed, 0))
+
+    def _draw(self) -> None:
+        calls = []
+        while True:
+            try:
+                calls.append(self._calls.get_nowait())
+            except Empty:
+                break
+
+        frame = self._frames.take()
+        if frame is not None:
+            start = time.perf_counter()
+            self._renderer.render_frame(frame)
+            if self._profiler is not None:
+                self._profiler.add_frame(time.perf_counter() - start)
+
+        for function in calls:
+            function()
@@ -1,9 +1,27 @@
-from copy import copy
+import sys
+from typing import override
 
 from simulation.entities import Entity
-from simulation.presentation.console import clear, clear_lines
+from simulation.presentation.console import (
+    CLEAR_SCREEN,
+    ERASE_LINE,
+    clear,
+    clear_lines,
+    get_display_width,
+    move_cursor,
+)
+from simulation.presentation.frame import Frame, FrameRecorder
 from simulation.world import World
 
+SIMULATE_PROMPT = (
+    "Enter s - to simulate, p - to pause, r - to reverse simulate, "
+    "g N - to go to turn N, q - to quit: "
+)
+PAUSE_PROMPT = (
+    "Enter s - to simulate, r - to reverse simulate, "
+    "g N - to go to turn N, q - to quit: "
+)
+
 
 class Renderer:
     def __init__(
@@ -15,47 +33,155 @@ class Renderer:
         self._default_icon = default_icon
 
     def render(self, world: World, turn: int) -> None:
-        row = [self._default_icon] * world.width
-        world_map = [copy(row) for _ in range(world.hight)]
-
-        all_entitys = world.get_all_entitys()
-        count_entitys: dict[str, int] = {}
+        self.render_frame(Frame.from_world(world, turn))
 
-        for point, entity in all_entitys:
-            icon = self._entity_icons[type(entity)]
-            world_map[point.y][point.x] = icon
+    def render_frame(self, frame: Frame) -> None:
+        icons = [self._default_icon] * len(frame.cells)
+        for cell, entity in enumerate(frame.cells):
+            if entity is not None:
+                icons[cell] = self._entity_icons[type(entity)]
 
-            current_count = count_entitys.setdefault(icon, 0)
-            count_entitys[icon] = current_count + 1
+        width = frame.width
+        rows = ["".join(icons[y * width : (y + 1) * width]) for y in range(frame.hight)]
 
-        lines_render = 0
-        render_world = ""
-        for row in world_map:
-            lines_render += 1
-            render_world += "".join(row) + "\n"
+        count_entitys: dict[str, int] = {}
+        for entity_type, count in frame.counts.items():
+            icon = self._entity_icons[entity_type]
+            count_entitys[icon] = count_entitys.get(icon, 0) + count
 
         render_statistic = "\n"
         for icon, count in count_entitys.items():
-            lines_render += 1
             render_statistic += f"{icon}: {count}\n"
 
         cli_lines = 10
 
-        clear_lines(lines_render + cli_lines)
-        print(render_world)
-        print(f"Turn: {turn}")
+        clear_lines(len(rows) + len(count_entitys) + cli_lines)
+        print("\n".join(rows) + "\n")
+        print(f"Turn: {frame.turn}")
         print(render_statistic)
-        print(
-            "Enter s - to simulate, p - to pause, "
-            "r - to reverse simulate, q - to quit: \r"
-        )
+        print(f"{SIMULATE_PROMPT}\r")
 
     def end_game(self) -> None:
         print("\rSimulation finished")
 
     def pause_game(self) -> None:
         clear_lines(1)
-        print("Enter s - to simulate, r - to reverse simulate, q - to quit: \r")
+        print(f"{PAUSE_PROMPT}\r")
 
     def clear_frame(self) -> None:
         clear()
+
+
+class IncrementalRenderer(Renderer):
+    """Renderer redrawing only the cells changed since the previous frame.
+
+    The first frame is drawn in full, after that only the changed cells of
+    the frame are drawn: every frame is one write of escape sequences moving
+    the cursor to the changed cells. Wide icons (emoji) take two columns,
+    narrower icons are padded.
+    """
+
+    def __init__(
+        self,
+        entity_icons: dict[type[Entity], str],
+        default_icon: str,
+    ):
+        super().__init__(entity_icons, default_icon)
+        cell_width = max(
+            get_display_width(icon) for icon in [default_icon, *entity_icons.values()]
+        )
+        self._cell_width = cell_width
+        self._icons = {
+            entity_type: _pad(icon, cell_width)
+            for entity_type, icon in entity_icons.items()
+        }
+        self._empty_icon = _pad(default_icon, cell_width)
+
+        # Rows and columns of the drawn frame, None if nothing is drawn
+        self._drawn_size: tuple[int, int] | None = None
+        self._recorder: FrameRecorder | None = None
+        self._frame = Frame()
+
+    @override
+    def render(self, world: World, turn: int) -> None:
+        """Render the world, changes of the world are tracked
+        from the first call"""
+        if self._recorder is None or self._recorder.world is not world:
+            if self._recorder is not None:
+                self._recorder.close()
+            self._recorder = FrameRecorder(world)
+
+        self._recorder.capture(turn, self._frame)
+        self.render_frame(self._frame)
+
+    @override
+    def render_frame(self, frame: Frame) -> None:
+        if frame.dirty_cells is None or self._drawn_size != (frame.hight, frame.width):
+            output = self._draw_cells(frame)
+        else:
+            output = self._draw_dirty_cells(frame, frame.dirty_cells)
+
+        hight = frame.hight
+        output.append(f"{move_cursor(hight + 2, 1)}Turn: {frame.turn}{ERASE_LINE}")
+        for row, (entity_type, icon) in enumerate(
+            self._entity_icons.items(), start=hight + 4
+        ):
+            count = frame.counts.get(entity_type, 0)
+            output.append(f"{move_cursor(row, 1)}{icon}: {count}{ERASE_LINE}")
+        output.append(self._draw_prompt(SIMULATE_PROMPT))
+
+        self._write(output)
+
+    @override
+    def pause_game(self) -> None:
+        if self._drawn_size is None:
+            super().pause_game()
+        else:
+            self._write([self._draw_prompt(PAUSE_PROMPT)])
+
+    @override
+    def clear_frame(self) -> None:
+        self._drawn_size = None
+        self._write([CLEAR_SCREEN, move_cursor(1, 1)])
+
+    def _draw_cells(self, frame: Frame) -> list[str]:
+        self._drawn_size = (frame.hight, frame.width)
+        output = [CLEAR_SCREEN, move_cursor(1, 1)]
+        width = frame.width
+        for y in range(frame.hight):
+            output.extend(map(self._get_icon, frame.cells[y * width : (y + 1) * width]))
+            output.append("\n")
+        return output
+
+    def _draw_dirty_cells(self, frame: Frame, dirty_cells: set[int]) -> list[str]:
+        output = []
+        width = frame.width
+        cell_width = self._cell_width
+        for cell in sorted(dirty_cells):
+            y, x = divmod(cell, width)
+            output.append(move_cursor(y + 1, x * cell_width + 1))
+            output.append(self._get_icon(frame.cells[cell]))
+        return output
+
+    def _draw_prompt(self, prompt: str) -> str:
+        """Prompt under the counts, the cursor is left on the next line
+        where the user types commands"""
+        hight = 0 if self._drawn_size is None else self._drawn_size[0]
+        row = hight + len(self._entity_icons) + 5
+        return (
+            f"{move_cursor(row, 1)}{prompt}{ERASE_LINE}"
+            f"{move_cursor(row + 1, 1)}{ERASE_LINE}"
+        )
+
+    def _get_icon(self, entity: Entity | None) -> str:
+        if entity is None:
+            return self._empty_icon
+        return self._icons[type(entity)]
+
+    def _write(self, output: list[str]) -> None:
+        sys.stdout.write("".join(output))
+        sys.stdout.flush()
+
+
+def _pad(icon: str, width: int) -> str:
+    return icon + " " * (width - get_display_width(icon))
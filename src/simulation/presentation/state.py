@@ -6,9 +6,13 @@ class Status(Enum):
     simulate = auto()
     pause = auto()
     reverse = auto()
+    seek = auto()
     quit = auto()
 
 
-@dataclass
-class State:
-    status: Status = Status.simulate
+@dataclass(frozen=True)
+class Command:
+    """Command of the user, the simulation switches to its status"""
+
+    status: Status
+    seek_turn: int = 1
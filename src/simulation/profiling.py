@@ -0,0 +1,102 @@
+import csv
+import json
+from pathlib import Path
+from threading import Lock
+from typing import override
+
+from simulation.entities import Creature, Entity
+from simulation.points import Point
+from simulation.world import WorldObserver
+
+
+class Profiler(WorldObserver):
+    """Wall times and counters of every turn of a run.
+
+    The engine, TurnAction, the path search and the render loop add to the
+    current turn if they were given a profiler, changes of the world are
+    counted as an observer (changes made between turns, by undo or seek,
+    are counted in the next turn). After the turn its values become a row:
+    times are named "time.<name>" (seconds), counters "count.<name>".
+    Without a profiler the hooks are skipped, so disabled profiling costs
+    only a check for None.
+    """
+
+    def __init__(self) -> None:
+        self.rows: list[dict[str, float]] = []
+        self._times: dict[str, float] = {}
+        self._counts: dict[str, int] = {}
+
+        # Frames are rendered in their own thread
+        self._render_lock = Lock()
+        self._render_time = 0.0
+        self._frames = 0
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self._times[name] = self._times.get(name, 0) + seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        self._counts[name] = self._counts.get(name, 0) + value
+
+    def add_frame(self, seconds: float) -> None:
+        """Called by the render thread after drawing a frame"""
+        with self._render_lock:
+            self._render_time += seconds
+            self._frames += 1
+
+    def end_turn(self, turn_number: int) -> None:
+        with self._render_lock:
+            render_time, self._render_time = self._render_time, 0.0
+            frames, self._frames = self._frames, 0
+
+        row: dict[str, float] = {"turn": turn_number}
+        for name, seconds in self._times.items():
+            row[f"time.{name}"] = seconds
+        for name, value in self._counts.items():
+            row[f"count.{name}"] = value
+        if frames:
+            row["time.render"] = render_time
+            row["count.render.frames"] = frames
+        self.rows.append(row)
+
+        self._times = {}
+        self._counts = {}
+
+    def save(self, path: Path) -> None:
+        """Save the rows as CSV or JSON, by the suffix of the path"""
+        match path.suffix:
+            case ".csv":
+                self._save_csv(path)
+            case ".json":
+                path.write_text(json.dumps(self.rows, indent=2))
+            case _:
+                raise ValueError(
+                    f"Unknown profile format {path.suffix}, use .csv or .json"
+                )
+
+    @override
+    def on_add(self, point: Point, entity: Entity) -> None:
+        self.count("world.add")
+
+    @override
+    def on_move(self, from_point: Point, to_point: Point, entity: Entity) -> None:
+        self.count("world.move")
+
+    @override
+    def on_remove(self, point: Point, entity: Entity) -> None:
+        self.count("world.remove")
+
+    @override
+    def on_hp_change(self, creature: Creature, old_hp: int, hp: int) -> None:
+        self.count("world.hp")
+
+    @override
+    def on_reset(self) -> None:
+        self.count("world.reset")
+
+    def _save_csv(self, path: Path) -> None:
+        # Rows have only the names used during their turn
+        names = {name for row in self.rows for name in row if name != "turn"}
+        with path.open("w", newline="") as f:
+            writer = csv.DictWriter(f, ["turn", *sorted(names)], restval=0)
+            writer.writeheader()
+            writer.writerows(self.rows)
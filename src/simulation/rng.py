@@ -0,0 +1,39 @@
+from random import Random
+from typing import Any
+
+
+class RandomStreams:
+    """Independent random number generators derived from one seed.
+
+    Every subsystem (a spawn action, the movement of creatures, a worker
+    process) takes its own stream by name, so the numbers it draws do not
+    depend on how many numbers the other subsystems have drawn before.
+    The streams are seeded from a string, which is hashed the same way in
+    every process. Without a seed the streams are seeded by the system.
+    """
+
+    def __init__(self, seed: int | str | None = None) -> None:
+        self.seed = seed
+        self._streams: dict[str, Random] = {}
+
+    def get(self, name: str) -> Random:
+        stream = self._streams.get(name)
+        if stream is None:
+            seed = None if self.seed is None else f"{self.seed}/{name}"
+            stream = Random(seed)
+            self._streams[name] = stream
+        return stream
+
+    def derive(self, name: str) -> "RandomStreams":
+        """Streams of a part of the simulation, for example of one worker"""
+        if self.seed is None:
+            return RandomStreams()
+        return RandomStreams(f"{self.seed}/{name}")
+
+    def getstate(self) -> dict[str, tuple[Any, ...]]:
+        """States of the streams taken so far, see Random.getstate"""
+        return {name: stream.getstate() for name, stream in self._streams.items()}
+
+    def setstate(self, states: dict[str, tuple[Any, ...]]) -> None:
+        for name, state in states.items():
+            self.get(name).setstate(state)
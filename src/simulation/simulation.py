@@ -1,71 +1,138 @@
-import time
-from copy import copy
+import asyncio
+from contextlib import suppress
+from threading import Event
 
-from simulation.actions.base import Action
+from simulation.engine import Engine
+from simulation.presentation.render_loop import RenderLoop
 from simulation.presentation.renderer import Renderer
-from simulation.presentation.state import State, Status
-from simulation.world import World
+from simulation.presentation.state import Command, Status
+from simulation.profiling import Profiler
+
+
+class Ticker:
+    """Ticks every interval seconds of the event loop clock.
+
+    The ticks are due at start + n * interval, not an interval after the
+    previous tick was handled, so the time of the turns and the lateness
+    of the wakeups do not add up. If a tick is late by more than the
+    interval, the turns can not keep up: the missed ticks are skipped
+    and the schedule starts over. Interval 0 ticks as fast as possible.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self._interval = interval
+        self._deadline = 0.0
+        # Seconds the last tick was handled after it was due
+        self.drift = 0.0
+
+    def reset(self) -> None:
+        """The next tick is due an interval from now"""
+        self._deadline = asyncio.get_running_loop().time() + self._interval
+
+    async def wait(self, commands: asyncio.Queue[Command]) -> Command | None:
+        """Wait for the next tick, the command if it comes first"""
+        try:
+            async with asyncio.timeout_at(self._deadline):
+                return await commands.get()
+        except TimeoutError:
+            pass
+
+        now = asyncio.get_running_loop().time()
+        self.drift = now - self._deadline
+        self._deadline = max(self._deadline + self._interval, now)
+        return None
 
 
 class Simulation:
+    """Interactive simulation: one turn per turn interval, rendered to the
+    console by a render loop and controlled by the commands of the user.
+
+    The commands come as events of an asyncio loop, so they are handled
+    as soon as the current turn ends, whatever the turn interval is, and
+    a paused simulation waits for them without using the CPU.
+    """
+
     def __init__(
         self,
-        world: World,
-        init_actions: list[Action],
-        turn_actions: list[Action],
+        engine: Engine,
         renderer: Renderer,
-        state: State,
+        fps: float = 30,
+        turn_interval: float = 1,
+        profiler: Profiler | None = None,
     ):
-        self._world = world
-        self._turn_actions = turn_actions
+        self._engine = engine
         self._renderer = renderer
-        self._state = state
-        self._turn_number = 1
-        self._action_history: list[list[Action]] = []
+        self._profiler = profiler
+        self._ticker = Ticker(turn_interval)
+        self._render_loop = RenderLoop(renderer, engine.world, fps, profiler)
 
-        for init_action in init_actions:
-            init_action(self._world)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._commands: asyncio.Queue[Command] = asyncio.Queue()
+        self._started = Event()
 
     def start(self) -> None:
-        self._renderer.clear_frame()
-        self._renderer.render(self._world, self._turn_number)
-        while True:
-            match self._state.status:
-                case Status.simulate:
-                    self._simulate()
-                case Status.quit:
-                    self._renderer.end_game()
-                    break
-                case Status.pause:
-                    self._renderer.pause_game()
-                    time.sleep(1)
-                case Status.reverse:
-                    self._reverse_simulate()
+        """Run the simulation until the quit command or Ctrl+C"""
+        with suppress(KeyboardInterrupt):
+            asyncio.run(self.run())
 
-    def _simulate(self) -> None:
-        time.sleep(1)
-        turn_action_history: list[Action] = []
-        for turn_action in self._turn_actions:
-            turn_action(self._world)
-
-            turn_action_history.append(copy(turn_action))
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._started.set()
+        self._render_loop.start(self._engine.turn_number)
+        try:
+            await self._handle_commands()
+        finally:
+            self._render_loop.stop()
+            self._renderer.end_game()
 
-        self._turn_number += 1
-        self._renderer.render(self._world, self._turn_number)
+    def send(self, command: Command) -> None:
+        """Deliver the command to the simulation, called from any thread"""
+        self._started.wait()
+        if self._loop is not None:
+            # The loop is closed after the quit command
+            with suppress(RuntimeError):
+                self._loop.call_soon_threadsafe(self._commands.put_nowait, command)
 
-        self._action_history.append(turn_action_history)
+    async def _handle_commands(self) -> None:
+        ticking = (Status.simulate, Status.reverse)
+        status = Status.simulate
+        self._ticker.reset()
+        while True:
+            if status in ticking:
+                command = await self._ticker.wait(self._commands)
+            else:
+                command = await self._commands.get()
 
-    def _reverse_simulate(self) -> None:
-        self._renderer.render(self._world, self._turn_number)
+            if command is None:
+                self._make_turn(status)
+                continue
 
-        time.sleep(1)
+            previous_status = status
+            status = command.status
+            match status:
+                case Status.simulate | Status.reverse:
+                    if previous_status not in ticking:
+                        self._ticker.reset()
+                case Status.pause:
+                    self._render_loop.call(self._renderer.pause_game)
+                case Status.seek:
+                    self._seek(command.seek_turn)
+                    status = Status.pause
+                    self._render_loop.call(self._renderer.pause_game)
+                case Status.quit:
+                    break
 
-        try:
-            turn_action_history = reversed(self._action_history.pop())
-        except IndexError:
-            return
+    def _make_turn(self, status: Status) -> None:
+        if status is Status.simulate:
+            if self._profiler is not None:
+                self._profiler.add_time("tick.drift", self._ticker.drift)
+            self._engine.step()
+            self._render_loop.publish(self._engine.turn_number)
+        elif self._engine.undo():
+            self._render_loop.publish(self._engine.turn_number)
 
-        for turn_action in turn_action_history:
-            turn_action.undo(self._world)
+    def _seek(self, turn: int) -> None:
+        with suppress(ValueError):
+            self._engine.seek(turn)
 
-        self._turn_number -= 1
+        self._render_loop.publish(self._engine.turn_number)
@@ -0,0 +1,344 @@
+import bisect
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Self
+
+from simulation.actions import EntityFactory
+from simulation.entities import Creature, Entity, Grass, Herbivore, Predator, Rock, Tree
+from simulation.exceptions import SnapshotFormatError
+from simulation.find_path.cache import LocalRepairPathCache, PlannedPath
+from simulation.points import Point, from_cell, to_cell
+from simulation.rng import RandomStreams
+from simulation.world import World
+
+# Type codes of the entities in snapshots, new types must be appended
+ENTITY_TYPES: tuple[type[Entity], ...] = (Rock, Tree, Grass, Herbivore, Predator)
+
+MAGIC = b"SIMS"
+VERSION = 4
+# Magic, version, turn number, width, hight, number of entities
+HEADER = struct.Struct("<4sHIIII")
+# Number of random streams
+STREAMS_HEADER = struct.Struct("<I")
+# Length of the name, whether gauss_next is set, gauss_next
+STREAM_HEADER = struct.Struct("<HBd")
+# Words of the Mersenne Twister state and the position in it
+RANDOM_STATE_SIZE = 625
+# Number of planned paths, number of cells in all of them
+PATHS_HEADER = struct.Struct("<II")
+
+
+@dataclass
+class Snapshot:
+    """State of the world at the start of a turn.
+
+    Columns of positions, type codes and hp of the entities in the order
+    they were added to the world, so the restored world makes the same
+    turns, states of the random streams and the paths the creatures
+    follow (see LocalRepairPathCache): the index of the creature in the
+    columns, the cell of the target, the number of cells and the cells of
+    all paths one after another.
+    """
+
+    turn_number: int
+    width: int
+    hight: int
+    x: array[int]
+    y: array[int]
+    type_codes: array[int]
+    hp: array[int]
+    random_states: dict[str, tuple[Any, ...]] = field(default_factory=dict)
+    path_entities: array[int] = field(default_factory=lambda: array("i"))
+    path_targets: array[int] = field(default_factory=lambda: array("i"))
+    path_lengths: array[int] = field(default_factory=lambda: array("i"))
+    path_cells: array[int] = field(default_factory=lambda: array("i"))
+
+    @classmethod
+    def capture(
+        cls,
+        world: World,
+        turn_number: int,
+        streams: RandomStreams | None = None,
+        path_cache: LocalRepairPathCache | None = None,
+    ) -> Self:
+        type_codes = {
+            entity_type: type_code for type_code, entity_type in enumerate(ENTITY_TYPES)
+        }
+        snapshot = cls(
+            turn_number,
+            world.width,
+            world.hight,
+            array("i"),
+            array("i"),
+            array("B"),
+            array("i"),
+            {} if streams is None else streams.getstate(),
+        )
+        for index, (point, entity) in enumerate(world.get_all_entitys()):
+            snapshot.x.append(point.x)
+            snapshot.y.append(point.y)
+            snapshot.type_codes.append(type_codes[type(entity)])
+            snapshot.hp.append(entity.hp if isinstance(entity, Creature) else 0)
+
+            if path_cache is None or not isinstance(entity, Creature):
+                continue
+            planned = path_cache.get(entity)
+            if planned is not None:
+                snapshot.path_entities.append(index)
+                snapshot.path_targets.append(to_cell(planned.target, world.width))
+                snapshot.path_lengths.append(len(planned.path))
+                snapshot.path_cells.extend(
+                    to_cell(path_point, world.width) for path_point in planned.path
+                )
+        return snapshot
+
+    def restore(
+        self,
+        world: World,
+        factories: Mapping[type[Entity], EntityFactory],
+        path_cache: LocalRepairPathCache | None = None,
+    ) -> None:
+        """Replace the entities of the world (see World.replace), entities
+        are created by the factories of their types"""
+        if (world.width, world.hight) != (self.width, self.hight):
+            raise SnapshotFormatError(
+                f"Snapshot of {self.width}x{self.hight} world "
+                f"does not fit {world.width}x{world.hight} world"
+            )
+
+        entities = []
+        for x, y, type_code, hp in zip(
+            self.x, self.y, self.type_codes, self.hp, strict=True
+        ):
+            entity = factories[ENTITY_TYPES[type_code]].spawn_entity()
+            if isinstance(entity, Creature):
+                entity.hp = hp
+            entities.append((Point(x, y), entity))
+
+        world.replace(entities)
+
+        if path_cache is None:
+            return
+        path_start = 0
+        for index, target, length in zip(
+            self.path_entities, self.path_targets, self.path_lengths, strict=True
+        ):
+            creature = entities[index][1]
+            if not isinstance(creature, Creature):
+                raise SnapshotFormatError("Path of an entity that is not a creature")
+            path_cells = self.path_cells[path_start : path_start + length]
+            path_start += length
+            path_cache.set(
+                creature,
+                PlannedPath(
+                    from_cell(target, self.width),
+                    [from_cell(cell, self.width) for cell in path_cells],
+                ),
+            )
+
+    def to_bytes(self) -> bytes:
+        parts = [
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                self.turn_number,
+                self.width,
+                self.hight,
+                len(self.type_codes),
+            ),
+            *(
+                _to_little_endian(column)
+                for column in (
+                    self.x,
+                    self.y,
+                    self.type_codes,
+                    self.hp,
+                )
+            ),
+            STREAMS_HEADER.pack(len(self.random_states)),
+        ]
+        for name, (_, words, gauss_next) in self.random_states.items():
+            encoded_name = name.encode()
+            parts.append(
+                STREAM_HEADER.pack(
+                    len(encoded_name),
+                    gauss_next is not None,
+                    gauss_next or 0.0,
+                )
+            )
+            parts.append(encoded_name)
+            parts.append(_to_little_endian(array("I", words)))
+
+        parts.append(PATHS_HEADER.pack(len(self.path_entities), len(self.path_cells)))
+        parts.extend(
+            _to_little_endian(column)
+            for column in (
+                self.path_entities,
+                self.path_targets,
+                self.path_lengths,
+                self.path_cells,
+            )
+        )
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Self:
+        """Raises SnapshotFormatError if data is not a snapshot"""
+        try:
+            return cls._decode(memoryview(data))
+        except (struct.error, ValueError, IndexError) as error:
+            raise SnapshotFormatError("Snapshot is damaged") from error
+
+    def save(self, path: Path) -> None:
+        """Write the snapshot to the file, the file is replaced at once,
+        so a crash while saving leaves the previous snapshot"""
+        temporary_path = path.with_name(f"{path.name}.tmp")
+        temporary_path.write_bytes(self.to_bytes())
+        temporary_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        return cls.from_bytes(path.read_bytes())
+
+    @classmethod
+    def _decode(cls, data: memoryview) -> Self:
+        magic, version, *header = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotFormatError("Not a snapshot or unsupported version")
+
+        turn_number, width, hight, count = header
+        offset = HEADER.size
+        columns = []
+        for typecode, length in (
+            ("i", count),
+            ("i", count),
+            ("B", count),
+            ("i", count),
+        ):
+            column, offset = _from_little_endian(data, offset, typecode, length)
+            columns.append(column)
+
+        x, y, type_codes, hp = columns
+        snapshot = cls(turn_number, width, hight, x, y, type_codes, hp)
+
+        (streams,) = STREAMS_HEADER.unpack_from(data, offset)
+        offset += STREAMS_HEADER.size
+        for _ in range(streams):
+            name_length, has_gauss_next, gauss_next = STREAM_HEADER.unpack_from(
+                data, offset
+            )
+            offset += STREAM_HEADER.size
+            name = bytes(data[offset : offset + name_length]).decode()
+            offset += name_length
+            words, offset = _from_little_endian(data, offset, "I", RANDOM_STATE_SIZE)
+            snapshot.random_states[name] = (
+                3,
+                tuple(words),
+                gauss_next if has_gauss_next else None,
+            )
+
+        paths, path_cells = PATHS_HEADER.unpack_from(data, offset)
+        offset += PATHS_HEADER.size
+        columns = []
+        for length in (paths, paths, paths, path_cells):
+            column, offset = _from_little_endian(data, offset, "i", length)
+            columns.append(column)
+        (
+            snapshot.path_entities,
+            snapshot.path_targets,
+            snapshot.path_lengths,
+            snapshot.path_cells,
+        ) = columns
+
+        if offset != len(data):
+            raise SnapshotFormatError("Unexpected data after the snapshot")
+        return snapshot
+
+
+class Keyframes:
+    """Snapshots taken every interval turns, kept encoded in memory.
+
+    Without an interval no keyframes are kept, but the world can still be
+    captured to and restored from snapshots, e.g. checkpoints on disk.
+    When there are more than max_count keyframes every second one is
+    dropped and the interval is doubled, so the keyframes still cover
+    all turns made.
+    """
+
+    def __init__(
+        self,
+        factories: Mapping[type[Entity], EntityFactory],
+        streams: RandomStreams,
+        interval: int | None = None,
+        path_cache: LocalRepairPathCache | None = None,
+        max_count: int | None = None,
+    ) -> None:
+        self._factories = factories
+        self._streams = streams
+        self._interval = interval
+        self._path_cache = path_cache
+        self._max_count = max_count
+        self._keyframes: dict[int, bytes] = {}
+
+    def capture(self, world: World, turn_number: int) -> Snapshot:
+        return Snapshot.capture(world, turn_number, self._streams, self._path_cache)
+
+    def restore(self, world: World, snapshot: Snapshot) -> None:
+        """Replace the entities of the world, the states of the random
+        streams and the planned paths with the snapshot"""
+        if self._path_cache is not None:
+            self._path_cache.clear()
+        snapshot.restore(world, self._factories, self._path_cache)
+        self._streams.setstate(snapshot.random_states)
+
+    def on_turn(self, world: World, turn_number: int) -> None:
+        """Take a keyframe if it is time, turn 1 always has a keyframe"""
+        interval = self._interval
+        if interval is None or (turn_number - 1) % interval:
+            return
+
+        keyframes = self._keyframes
+        keyframes[turn_number] = self.capture(world, turn_number).to_bytes()
+        if self._max_count is not None and len(keyframes) > self._max_count:
+            interval *= 2
+            self._keyframes = {
+                keyframe_turn_number: keyframe
+                for keyframe_turn_number, keyframe in keyframes.items()
+                if (keyframe_turn_number - 1) % interval == 0
+            }
+            self._interval = interval
+
+    def find(self, turn_number: int) -> Snapshot | None:
+        """The latest keyframe not after the turn"""
+        turn_numbers = sorted(self._keyframes)
+        index = bisect.bisect_right(turn_numbers, turn_number)
+        if index == 0:
+            return None
+        return Snapshot.from_bytes(self._keyframes[turn_numbers[index - 1]])
+
+
+def _to_little_endian(column: array[int]) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_little_endian(
+    data: memoryview,
+    offset: int,
+    typecode: str,
+    count: int,
+) -> tuple[array[int], int]:
+    column = array(typecode)
+    end = offset + column.itemsize * count
+    column.frombytes(data[offset:end])
+    if len(column) != count:
+        raise SnapshotFormatError("Snapshot is truncated")
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column, end
@@ -0,0 +1,188 @@
+"""Statistics of every turn streamed to a file or stdout"""
+
+import csv
+import io
+import json
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TextIO, override
+
+from simulation.entities import Creature, Entity, Grass, Herbivore, Predator
+from simulation.points import Point
+from simulation.world import World, WorldObserver
+
+COUNTED_ENTITIES: dict[str, type[Entity]] = {
+    "predator": Predator,
+    "herbivore": Herbivore,
+    "grass": Grass,
+}
+# Mean hp is written for the creatures only
+HP_ENTITIES: dict[str, type[Creature]] = {
+    name: entity_type
+    for name, entity_type in COUNTED_ENTITIES.items()
+    if issubclass(entity_type, Creature)
+}
+STATS_COLUMNS = [
+    "turn",
+    "duration",
+    *(f"population.{name}" for name in COUNTED_ENTITIES),
+    *(f"births.{name}" for name in COUNTED_ENTITIES),
+    *(f"deaths.{name}" for name in COUNTED_ENTITIES),
+    *(f"hp.{name}" for name in HP_ENTITIES),
+]
+
+
+class StatsWriter:
+    """Writes rows as NDJSON or CSV, by the suffix of the path, NDJSON
+    to stdout if there is no path.
+
+    Rows are formatted and written in batches of batch_size rows, the file
+    is flushed at most every flush_interval seconds, so the rows of a long
+    run reach the file while it goes on.
+    """
+
+    def __init__(
+        self,
+        path: Path | None,
+        columns: Sequence[str],
+        batch_size: int = 1000,
+        flush_interval: float = 1,
+    ) -> None:
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._rows: list[tuple[float, ...]] = []
+        self._flushed = time.monotonic()
+        # Values are ints and finite floats, their repr is valid JSON
+        self._json_row = (
+            "{" + ", ".join(f"{json.dumps(column)}: %r" for column in columns) + "}\n"
+        )
+
+        self._file: TextIO
+        if path is None:
+            self._file = sys.stdout
+            self._csv = False
+            return
+
+        match path.suffix:
+            case ".csv":
+                self._csv = True
+            case ".ndjson" | ".jsonl":
+                self._csv = False
+            case _:
+                raise ValueError(
+                    f"Unknown stats format {path.suffix}, use .ndjson, .jsonl or .csv"
+                )
+        self._file = path.open("w", newline="")
+        if self._csv:
+            csv.writer(self._file).writerow(columns)
+
+    def write(self, row: tuple[float, ...]) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= self._batch_size:
+            self._write_rows()
+        if time.monotonic() - self._flushed >= self._flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._write_rows()
+        self._file.flush()
+        self._flushed = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        if self._file is not sys.stdout:
+            self._file.close()
+
+    def _write_rows(self) -> None:
+        if not self._rows:
+            return
+
+        if self._csv:
+            batch = io.StringIO()
+            csv.writer(batch).writerows(self._rows)
+            self._file.write(batch.getvalue())
+        else:
+            json_row = self._json_row
+            self._file.write("".join([json_row % row for row in self._rows]))
+        self._rows = []
+
+
+class TurnStats(WorldObserver):
+    """Population, births, deaths and mean hp of the counted entities
+    after every turn, written as a row of STATS_COLUMNS.
+
+    Population and hp are read from the counters of the world, births and
+    deaths are counted as an observer of it, so a turn does not scan
+    the world. Changes made between turns (undo, seek, restore) change
+    the population, but are not births or deaths.
+    """
+
+    def __init__(self, writer: StatsWriter) -> None:
+        self._writer = writer
+        self._world: World | None = None
+        # Index of the counted type of the entity type, None if not counted
+        self._indexes: dict[type[Entity], int | None] = {}
+        counted = len(COUNTED_ENTITIES)
+        self._births = [0] * counted
+        self._deaths = [0] * counted
+
+    def watch(self, world: World) -> None:
+        """Count the births and deaths in the world"""
+        self._world = world
+        world.subscribe(self)
+
+    def start_turn(self) -> None:
+        counted = len(COUNTED_ENTITIES)
+        self._births = [0] * counted
+        self._deaths = [0] * counted
+
+    def end_turn(self, turn_number: int, duration: float) -> None:
+        world = self._world
+        if world is None:
+            raise RuntimeError("Stats do not watch a world")
+
+        mean_hp = []
+        for creature_type in HP_ENTITIES.values():
+            count = world.count(creature_type)
+            mean_hp.append(world.total_hp(creature_type) / count if count else 0)
+        self._writer.write(
+            (
+                turn_number,
+                duration,
+                *map(world.count, COUNTED_ENTITIES.values()),
+                *self._births,
+                *self._deaths,
+                *mean_hp,
+            )
+        )
+
+    @override
+    def on_add(self, point: Point, entity: Entity) -> None:
+        index = self._get_index(type(entity))
+        if index is not None:
+            self._births[index] += 1
+
+    @override
+    def on_remove(self, point: Point, entity: Entity) -> None:
+        index = self._get_index(type(entity))
+        if index is not None:
+            self._deaths[index] += 1
+
+    def _get_index(self, entity_type: type[Entity]) -> int | None:
+        try:
+            return self._indexes[entity_type]
+        except KeyError:
+            pass
+
+        index = next(
+            (
+                index
+                for index, counted_type in enumerate(COUNTED_ENTITIES.values())
+                if issubclass(entity_type, counted_type)
+            ),
+            None,
+        )
+        self._indexes[entity_type] = index
+        return index
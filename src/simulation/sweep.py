@@ -0,0 +1,250 @@
+"""Parameter sweep: headless runs of config variants in worker processes"""
+
+import itertools
+import time
+import tomllib
+from collections.abc import Callable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import fmean
+from typing import Any
+
+from simulation.builder import create_engine
+from simulation.config import load_config_data, retort
+from simulation.rng import RandomStreams
+from simulation.stats import COUNTED_ENTITIES
+
+EXTINCT_ENTITIES = ("predator", "herbivore")
+
+
+@dataclass
+class SweepConfig:
+    """Sweep over the base config.
+
+    Keys of grid and random are dotted config keys, e.g. "starve.power".
+    Every combination of the grid values is a variant, random draws samples
+    variants for each combination with values in the [low, high] ranges.
+    """
+
+    turns: int
+    repeats: int = 1
+    seed: int = 0
+    timeout: float | None = None
+    samples: int = 1
+    # Values are passed to the config as they are in the sweep config
+    grid: dict[str, list[Any]] = field(default_factory=dict)
+    random: dict[str, list[Any]] = field(default_factory=dict)
+
+
+@dataclass
+class Scenario:
+    variant: int
+    repeat: int
+    config_data: dict[str, Any]
+    turns: int
+    timeout: float | None
+
+
+@dataclass
+class ScenarioResult:
+    variant: int
+    repeat: int
+    turns: int
+    timed_out: bool
+    duration: float
+    # Number of entities of each counted type after each turn
+    population: dict[str, list[int]]
+    # The first turn after which there are no creatures of the type
+    extinction: dict[str, int | None]
+
+
+def load_sweep_config(path: Path) -> SweepConfig:
+    with path.open(mode="rb") as f:
+        data = tomllib.load(f)
+
+    sweep = retort.load(data, SweepConfig)
+    for key, bounds in sweep.random.items():
+        if len(bounds) != 2 or not all(  # noqa: PLR2004
+            isinstance(bound, int | float) for bound in bounds
+        ):
+            raise ValueError(f"Random range of {key} must be [low, high]")
+    return sweep
+
+
+def create_variants(sweep: SweepConfig) -> list[dict[str, Any]]:
+    keys = list(sweep.grid)
+    variants = [
+        dict(zip(keys, values, strict=True))
+        for values in itertools.product(*sweep.grid.values())
+    ]
+    if not sweep.random:
+        return variants
+
+    rng = RandomStreams(sweep.seed).get("sweep.variants")
+    sampled_variants = []
+    for variant in variants:
+        for _ in range(sweep.samples):
+            sampled_variant = dict(variant)
+            for key, (low, high) in sweep.random.items():
+                if isinstance(low, int) and isinstance(high, int):
+                    sampled_variant[key] = rng.randint(low, high)
+                else:
+                    sampled_variant[key] = rng.uniform(low, high)
+            sampled_variants.append(sampled_variant)
+    return sampled_variants
+
+
+def apply_overrides(
+    config_data: Mapping[str, Any],
+    overrides: Mapping[str, Any],
+) -> dict[str, Any]:
+    data = deepcopy(dict(config_data))
+    for key, value in overrides.items():
+        *sections, name = key.split(".")
+        section = data
+        for section_name in sections:
+            section = section.setdefault(section_name, {})
+        section[name] = value
+    return data
+
+
+def create_scenarios(
+    sweep: SweepConfig,
+    config_data: Mapping[str, Any],
+    variants: list[dict[str, Any]],
+) -> list[Scenario]:
+    """Scenarios of all runs, each run has its own seed derived
+    from the sweep seed, so results do not depend on the worker running it"""
+    streams = RandomStreams(sweep.seed)
+    scenarios = []
+    for variant_index, variant in enumerate(variants):
+        variant_data = apply_overrides(config_data, variant)
+        for repeat in range(sweep.repeats):
+            seed = streams.get(f"sweep.run/{variant_index}/{repeat}").getrandbits(63)
+            scenarios.append(
+                Scenario(
+                    variant_index,
+                    repeat,
+                    {**variant_data, "seed": seed},
+                    sweep.turns,
+                    sweep.timeout,
+                )
+            )
+    return scenarios
+
+
+def run_scenario(scenario: Scenario) -> ScenarioResult:
+    """Run one scenario headless, stops after the turn
+    in which the timeout has expired"""
+    start = time.perf_counter()
+    engine = create_engine(load_config_data(scenario.config_data), keep_history=False)
+    world = engine.world
+
+    result = ScenarioResult(
+        scenario.variant,
+        scenario.repeat,
+        turns=0,
+        timed_out=False,
+        duration=0,
+        population={name: [] for name in COUNTED_ENTITIES},
+        extinction=dict.fromkeys(EXTINCT_ENTITIES),
+    )
+    while result.turns < scenario.turns:
+        if (
+            scenario.timeout is not None
+            and time.perf_counter() - start > scenario.timeout
+        ):
+            result.timed_out = True
+            break
+
+        engine.step()
+        result.turns += 1
+
+        for name, entity_type in COUNTED_ENTITIES.items():
+            count = world.count(entity_type)
+            result.population[name].append(count)
+            if (
+                count == 0
+                and name in result.extinction
+                and result.extinction[name] is None
+            ):
+                result.extinction[name] = result.turns
+
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def run_sweep(
+    sweep: SweepConfig,
+    config_data: Mapping[str, Any],
+    jobs: int | None = None,
+) -> dict[str, Any]:
+    """Run every scenario of the sweep in a pool of jobs processes
+    and return the summary"""
+    variants = create_variants(sweep)
+    scenarios = create_scenarios(sweep, config_data, variants)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(run_scenario, scenarios))
+    duration = time.perf_counter() - start
+
+    return {
+        "runs": len(results),
+        "duration": duration,
+        "variants": [
+            summarize_variant(
+                variant,
+                [result for result in results if result.variant == variant_index],
+            )
+            for variant_index, variant in enumerate(variants)
+        ],
+    }
+
+
+def summarize_variant(
+    overrides: dict[str, Any],
+    results: list[ScenarioResult],
+) -> dict[str, Any]:
+    population = {}
+    for name in COUNTED_ENTITIES:
+        curves = [result.population[name] for result in results]
+        population[name] = {
+            "mean": _aggregate_curves(curves, fmean),
+            "min": _aggregate_curves(curves, min),
+            "max": _aggregate_curves(curves, max),
+        }
+
+    extinction = {}
+    for name in EXTINCT_ENTITIES:
+        turns = [result.extinction[name] for result in results]
+        extinct_turns = [turn for turn in turns if turn is not None]
+        extinction[name] = {
+            "extinct_runs": len(extinct_turns),
+            "mean_turn": fmean(extinct_turns) if extinct_turns else None,
+            "turns": turns,
+        }
+
+    return {
+        "overrides": overrides,
+        "runs": len(results),
+        "timed_out": sum(result.timed_out for result in results),
+        "mean_duration": fmean(result.duration for result in results),
+        "population": population,
+        "extinction": extinction,
+    }
+
+
+def _aggregate_curves(
+    curves: list[list[int]],
+    aggregate: Callable[[list[int]], float],
+) -> list[float]:
+    """Aggregate curves turn by turn, over the runs that made the turn
+    (runs stopped by the timeout are shorter)"""
+    turns = max((len(curve) for curve in curves), default=0)
+    return [
+        aggregate([curve[turn] for curve in curves if turn < len(curve)])
+        for turn in range(turns)
+    ]
@@ -1,8 +1,8 @@
 """Package for realization of creature turns during simulation"""
 
-__all__ = ["Attack", "Eat", "Move", "FindPathStrategy", "Starve"]
+__all__ = ["Attack", "Eat", "Move", "FindPathStrategy", "PathCache", "Starve"]
 
 from simulation.turns.attack import Attack
 from simulation.turns.eat import Eat
-from simulation.turns.move import FindPathStrategy, Move
+from simulation.turns.move import FindPathStrategy, Move, PathCache
 from simulation.turns.starve import Starve
@@ -1,7 +1,7 @@
 from typing import override
 
 from simulation.entities import Creature, Herbivore, Predator
-from simulation.points import Point, find_near_entity
+from simulation.points import Point
 from simulation.turns.base import Turn
 from simulation.world import World
 
@@ -12,21 +12,20 @@ class Attack(Turn[Predator]):
 
     @override
     def __call__(self, entity: Predator, world: World) -> bool:
-        target_entitys = world.get_entities(Herbivore)
         entity_point = world.get_entity_position(entity)
 
-        closest_entity_result = find_near_entity(entity_point, target_entitys)
+        closest_entity_result = world.adjacent(Herbivore, entity_point)
 
         if closest_entity_result is None:
             return False
 
-        closest_entity, closest_entity_point = closest_entity_result
+        closest_entity_point, closest_entity = closest_entity_result
         self._attacked_creature = (closest_entity_point, closest_entity)
 
         if closest_entity.hp <= 0:
             return False
 
-        closest_entity.hp -= entity.power
+        world.set_hp(closest_entity, closest_entity.hp - entity.power)
 
         return True
 
@@ -36,4 +35,4 @@ class Attack(Turn[Predator]):
             return
 
         closest_entity = self._attacked_creature[1]
-        closest_entity.hp += entity.power
+        world.set_hp(closest_entity, closest_entity.hp + entity.power)
@@ -2,6 +2,8 @@ from abc import abstractmethod
 from typing import Protocol
 
 from simulation.entities import Creature
+from simulation.exceptions import EntityNotFoundError
+from simulation.points import Point
 from simulation.world import World
 
 
@@ -16,3 +18,14 @@ class Turn[T: Creature](Protocol):
 
     @abstractmethod
     def undo(self, entity: T, world: World) -> None: ...
+
+
+def get_living_position(creature: Creature, world: World) -> Point | None:
+    """Position of the creature, None if it was killed or eaten this turn"""
+    if creature.hp <= 0:
+        return None
+
+    try:
+        return world.get_entity_position(creature)
+    except EntityNotFoundError:
+        return None
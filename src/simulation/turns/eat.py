@@ -1,7 +1,7 @@
 from typing import override
 
 from simulation.entities import Creature, Entity, Target
-from simulation.points import Point, find_near_entity
+from simulation.points import Point
 from simulation.turns.base import Turn
 from simulation.world import World
 
@@ -16,21 +16,26 @@ class Eat(Turn[Creature]):
         self._eated_entity = None
         self._current_hp = None
 
-        target_entitys: list[tuple[Point, Target]] = world.get_entities(entity.target)
         entity_point = world.get_entity_position(entity)
-        closest_entity_result = find_near_entity(entity_point, target_entitys)
+        closest_entity_result: tuple[Point, Target] | None = world.adjacent(
+            entity.target,
+            entity_point,
+        )
 
         if closest_entity_result is None:
             return False
 
-        closest_entity, closest_entity_point = closest_entity_result
+        closest_entity_point, closest_entity = closest_entity_result
 
         if not closest_entity.can_eaten():
             return False
 
         self._eated_entity = (closest_entity_point, closest_entity)
         self._current_hp = entity.hp
-        entity.hp = min(entity.max_hp, entity.hp + closest_entity.nutritional_quality)
+        world.set_hp(
+            entity,
+            min(entity.max_hp, entity.hp + closest_entity.nutritional_quality),
+        )
 
         world.remove(closest_entity)
         return True
@@ -41,4 +46,4 @@ class Eat(Turn[Creature]):
             world.add(*self._eated_entity)
 
         if self._current_hp is not None:
-            entity.hp = self._current_hp
+            world.set_hp(entity, self._current_hp)
@@ -1,29 +1,57 @@
-import random
+from random import Random
 from typing import Protocol, override
 
 from simulation.entities import Creature
 from simulation.exceptions import NotFindPathError
-from simulation.points import Point, find_closest_point_entity, get_closest_points
+from simulation.points import Point, from_cell, get_closest_offsets
 from simulation.turns.base import Turn
 from simulation.world import World
 
 
 class FindPathStrategy(Protocol):
+    # Nodes expanded by the last search, for profiling
+    expanded_nodes: int = 0
+
     def __call__(
         self,
         current_point: Point,
         target_point: Point,
         world: World,
+        max_distance: int | None = None,
     ) -> list[Point]:
         """Algorithm for finding the shortest path to a given point in the world
+        The search does not leave the square of max_distance around current_point
         Raises NotFindPathError  if there is no path
         """
         ...
 
 
+class PathCache(Protocol):
+    def __call__(
+        self,
+        creature: Creature,
+        current_point: Point,
+        target_point: Point,
+        world: World,
+        max_distance: int | None = None,
+    ) -> list[Point]:
+        """Path of the creature to the target point, the path planned on its
+        previous turns if it still leads there, otherwise a new path
+        Raises NotFindPathError if there is no path
+        """
+        ...
+
+
 class Move(Turn[Creature]):
-    def __init__(self, find_path_strategy: FindPathStrategy) -> None:
+    def __init__(
+        self,
+        find_path_strategy: FindPathStrategy,
+        rng: Random | None = None,
+        path_cache: PathCache | None = None,
+    ) -> None:
         self._find_path = find_path_strategy
+        self._rng = Random() if rng is None else rng
+        self._path_cache = path_cache
 
         self._start_point: Point | None = None
 
@@ -32,18 +60,38 @@ class Move(Turn[Creature]):
         current_point = world.get_entity_position(entity)
         self._start_point = current_point
 
-        target_entitys = world.get_entities(entity.target)
-        target_point = find_closest_point_entity(
+        closest_target = world.nearest(
+            entity.target,
             current_point,
-            target_entitys,
             entity.visual_radius,
         )
 
-        if target_point is None:
-            target_point = get_random_near_points(current_point, entity.speed, world)
+        if closest_target is None:
+            target_point = get_random_near_points(
+                current_point,
+                entity.speed,
+                world,
+                self._rng,
+            )
+        else:
+            target_point, _ = closest_target
 
         try:
-            path = self._find_path(current_point, target_point, world)
+            if self._path_cache is None:
+                path = self._find_path(
+                    current_point,
+                    target_point,
+                    world,
+                    entity.visual_radius,
+                )
+            else:
+                path = self._path_cache(
+                    entity,
+                    current_point,
+                    target_point,
+                    world,
+                    entity.visual_radius,
+                )
         except NotFindPathError:
             return False
 
@@ -64,9 +112,21 @@ def get_random_near_points(
     current_point: Point,
     radius: int,
     world: World,
+    rng: Random,
 ) -> Point:
-    near_points = get_closest_points(current_point, radius)
-    near_points = [
-        point for point in near_points if point in world and not world.is_used(point)
+    """Random free point of get_closest_points of the point,
+    the point itself if all of them are used"""
+    x, y = current_point
+    width = world.width
+    hight = world.hight
+    cells = world.cells
+    near_cells = [
+        (x + dx) + (y + dy) * width
+        for dx, dy in get_closest_offsets(radius)
+        if 0 <= x + dx < width
+        and 0 <= y + dy < hight
+        and cells[(x + dx) + (y + dy) * width] is None
     ]
-    return random.choice(near_points)
+    if not near_cells:
+        return current_point
+    return from_cell(rng.choice(near_cells), width)
@@ -13,7 +13,7 @@ class Starve(Turn[Creature]):
 
     @override
     def __call__(self, entity: Creature, world: World) -> bool:
-        entity.hp -= self._power
+        world.set_hp(entity, entity.hp - self._power)
 
         entity_point = world.get_entity_position(entity)
         self._starving_creature = entity_point, entity
@@ -28,6 +28,6 @@ class Starve(Turn[Creature]):
             return
 
         starving_creature = self._starving_creature[1]
-        starving_creature.hp += self._power
+        world.set_hp(starving_creature, starving_creature.hp + self._power)
         if starving_creature.hp > 0:
             world.add(*self._starving_creature)
@@ -1,6 +1,44 @@
-from simulation.entities import Entity
-from simulation.exceptions import EntityNotFoundError, PointAlreadyUsedError
-from simulation.points import Point
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import count
+from operator import itemgetter
+from random import Random
+from typing import Any
+
+from simulation.entities import Creature, Entity, StaticEntity
+from simulation.exceptions import (
+    EntityNotFoundError,
+    PointAlreadyUsedError,
+    PointOutsideWorldError,
+)
+from simulation.points import Point, from_cell, to_cell
+
+CHUNK_SIZE = 8
+# A point drawn at random costs about as much as the check of SCAN_COST free
+# cells, so sample_free_points lists the free cells for more than
+# free cells / SCAN_COST points instead of drawing them
+SCAN_COST = 12
+
+
+class WorldObserver:
+    """Receives notifications about changes of the world.
+
+    Subclasses override only the notifications they need.
+    """
+
+    def on_add(self, point: Point, entity: Entity) -> None:
+        """Entity was added to the world"""
+
+    def on_move(self, from_point: Point, to_point: Point, entity: Entity) -> None:
+        """Entity already in the world was moved to another point"""
+
+    def on_remove(self, point: Point, entity: Entity) -> None:
+        """Entity was removed from the world"""
+
+    def on_hp_change(self, creature: Creature, old_hp: int, hp: int) -> None:
+        """Hp of the creature was changed with World.set_hp"""
+
+    def on_reset(self) -> None:
+        """All entities of the world were replaced with World.replace"""
 
 
 class World:
@@ -8,8 +46,50 @@ class World:
         self.width = widht
         self.hight = hight
 
+        # Static entities are kept only in the cells, the other structures
+        # are for the entities with their own identity
         self._map: dict[Entity, Point] = {}
-        self._used_points: set[Point] = set()
+        self._cells: list[Entity | None] = [None] * (widht * hight)
+
+        # Entities of each requested type (subclasses included) in the order
+        # they were added to the world. Buckets are created on the first query
+        # of the type and then kept up to date by add and remove.
+        self._buckets: dict[type[Entity], dict[Any, None]] = {}
+        self._type_buckets: dict[type[Entity], list[dict[Any, None]]] = {}
+
+        # Spatial index: the map is split into CHUNK_SIZE x CHUNK_SIZE chunks,
+        # so radius queries only touch the chunks that overlap the radius.
+        self._chunks_width = (widht + CHUNK_SIZE - 1) // CHUNK_SIZE
+        chunks_hight = (hight + CHUNK_SIZE - 1) // CHUNK_SIZE
+        self._chunks: list[dict[Entity, None]] = [
+            {} for _ in range(self._chunks_width * chunks_hight)
+        ]
+        # Sequence number of the entity addition, ties in spatial queries are
+        # resolved in favor of the entity that was added earlier
+        self._order: dict[Entity, int] = {}
+        self._order_counter = count()
+
+        # Number of the entities and sum of the creature hp of every type
+        # (not subclasses), kept by add, remove and set_hp, so population
+        # queries do not scan the world. Queries of a base type sum up
+        # its subclasses, they are cached until a new type is added.
+        self._counts: dict[type[Entity], int] = {}
+        self._total_hp: dict[type[Entity], int] = {}
+        self._counted_subclasses: dict[type[Entity], list[type[Entity]]] = {}
+
+        self._free_count = widht * hight
+
+        self._observers: list[WorldObserver] = []
+
+    @property
+    def cells(self) -> Sequence[Entity | None]:
+        """Occupancy grid, the entity of the point is at index y * width + x"""
+        return self._cells
+
+    @property
+    def free_count(self) -> int:
+        """Number of the free cells"""
+        return self._free_count
 
     def __contains__(self, point: Point) -> bool:
         if point.x < 0 or point.y < 0:
@@ -18,24 +98,106 @@ class World:
 
     def add(self, point: Point, entity: Entity) -> None:
         """Adds an entity to the map at the given position.
-        If the entity is already on the map moves it to the given position
+        If the entity is already on the map moves it to the given position,
+        a static entity is added once more
 
         Raises PointAlreadyUsedError if point already used in world
+        Raises PointOutsideWorldError if point is outside the world
         """
+        if isinstance(entity, StaticEntity):
+            self._add_static(point, entity, self._observers)
+            return
+
         current_point = self._map.get(entity)
         if current_point == point:
             return
 
-        if point in self._used_points:
+        if point not in self:
+            raise PointOutsideWorldError
+
+        index = self._index(point)
+        if self._cells[index] is not None:
             raise PointAlreadyUsedError
 
         self._map[entity] = point
-        self._used_points.add(point)
+        self._cells[index] = entity
 
+        chunk = self._chunks[self._chunk_index(point)]
         if current_point is None:
+            self._free_count -= 1
+            chunk[entity] = None
+            self._order[entity] = next(self._order_counter)
+            self._count_added(entity)
+            for bucket in self._get_type_buckets(type(entity)):
+                bucket[entity] = None
+            for observer in self._observers:
+                observer.on_add(point, entity)
             return
 
-        self._used_points.remove(current_point)
+        self._cells[self._index(current_point)] = None
+
+        current_chunk = self._chunks[self._chunk_index(current_point)]
+        if current_chunk is not chunk:
+            del current_chunk[entity]
+            chunk[entity] = None
+
+        for observer in self._observers:
+            observer.on_move(current_point, point, entity)
+
+    def add_many(self, entities: Iterable[tuple[Point, Entity]]) -> None:
+        """Add new entities at the given positions, faster than add one by one.
+
+        Raises PointAlreadyUsedError if point already used in world
+        Raises PointOutsideWorldError if point is outside the world
+        Raises ValueError if the entity is already in the world
+        Entities before the one that raised the error stay in the world.
+        """
+        self._add_entities(entities, self._observers)
+
+    def replace(self, entities: Iterable[tuple[Point, Entity]]) -> None:
+        """Replace all entities of the world with the new entities, in bulk:
+        observers get one on_reset instead of a notification per entity.
+
+        Raises the errors of add_many
+        """
+        self._map.clear()
+        self._cells[:] = [None] * len(self._cells)
+        for chunk in self._chunks:
+            chunk.clear()
+        self._order.clear()
+        for bucket in self._buckets.values():
+            bucket.clear()
+        self._counts.clear()
+        self._total_hp.clear()
+        self._counted_subclasses = {}
+        self._free_count = len(self._cells)
+
+        self._add_entities(entities, ())
+        for observer in self._observers:
+            observer.on_reset()
+
+    def sample_free_points(self, count: int, rng: Random) -> list[Point]:
+        """Choose count distinct free points uniformly at random,
+        fewer if there are not enough free points.
+
+        The points depend only on which cells are free and on rng, so a world
+        restored from a snapshot samples the same points.
+        """
+        cells = self._cells
+        width = self.width
+        count = min(count, self._free_count)
+        if count * SCAN_COST > self._free_count:
+            free_cells = [cell for cell, entity in enumerate(cells) if entity is None]
+            return [from_cell(cell, width) for cell in rng.sample(free_cells, count)]
+
+        # Rejection sampling, a point takes size / free cells draws on average
+        size = len(cells)
+        chosen: dict[int, None] = {}
+        while len(chosen) < count:
+            cell = rng.randrange(size)
+            if cells[cell] is None and cell not in chosen:
+                chosen[cell] = None
+        return [from_cell(cell, width) for cell in chosen]
 
     def get_entity_position(self, entity: Entity) -> Point:
         """Get entity position in the world.
@@ -48,24 +210,370 @@ class World:
 
         return point
 
+    def get_entity(self, point: Point) -> Entity | None:
+        """Get the entity located at the given point, None if the point is free"""
+        if point not in self:
+            return None
+        return self._cells[self._index(point)]
+
     def get_entities[T: Entity](self, entity_type: type[T]) -> list[tuple[Point, T]]:
-        return [
-            (point, entity)
-            for entity, point in self._map.items()
-            if isinstance(entity, entity_type)
-        ]
+        bucket: dict[T, None] | None = self._buckets.get(entity_type)
+        if bucket is None:
+            bucket = self._create_bucket(entity_type)
+
+        entities_map = self._map
+        entities = [(entities_map[entity], entity) for entity in bucket]
+        if issubclass(entity_type, StaticEntity) or issubclass(
+            StaticEntity, entity_type
+        ):
+            entities.extend(self._get_static_entities(entity_type))
+        return entities
 
     def remove(self, entity: Entity) -> None:
-        current_point = self._map.get(entity)
-        del self._map[entity]
+        """Remove the entity, static entities are removed by remove_at"""
+        current_point = self._map.pop(entity)
+        self._cells[self._index(current_point)] = None
+        self._free_count += 1
+        del self._chunks[self._chunk_index(current_point)][entity]
+        del self._order[entity]
+        self._count_removed(entity)
 
-        if current_point is None:
+        for bucket in self._get_type_buckets(type(entity)):
+            del bucket[entity]
+
+        for observer in self._observers:
+            observer.on_remove(current_point, entity)
+
+    def remove_at(self, point: Point) -> None:
+        """Remove the entity at the point.
+
+        Raises EntityNotFoundError if the point is free
+        """
+        entity = self.get_entity(point)
+        if entity is None:
+            raise EntityNotFoundError
+
+        if not isinstance(entity, StaticEntity):
+            self.remove(entity)
             return
 
-        self._used_points.remove(current_point)
+        self._cells[self._index(point)] = None
+        self._free_count += 1
+        self._count_removed(entity)
+        for observer in self._observers:
+            observer.on_remove(point, entity)
+
+    def set_hp(self, creature: Creature, hp: int) -> None:
+        """Change hp of the creature, so observers are notified about it"""
+        old_hp = creature.hp
+        creature.hp = hp
+        if creature in self._map:
+            self._total_hp[type(creature)] += hp - old_hp
+        for observer in self._observers:
+            observer.on_hp_change(creature, old_hp, hp)
+
+    def subscribe(self, observer: WorldObserver) -> None:
+        self._observers.append(observer)
+
+    def unsubscribe(self, observer: WorldObserver) -> None:
+        self._observers.remove(observer)
+
+    def nearest[T: Entity](
+        self,
+        entity_type: type[T],
+        point: Point,
+        max_radius: int,
+    ) -> tuple[Point, T] | None:
+        """Find the entity of the given type closest to the point.
+
+        Only entities at a distance (|dx| + |dy|) less than max_radius are
+        considered. Of equally distant entities the one added earlier wins.
+        """
+        result: tuple[Point, T] | None = None
+        result_key = (max_radius, 0)
+
+        entities_map = self._map
+        for chunk_distance, chunk in self._get_chunks_by_distance(
+            point, max_radius - 1
+        ):
+            if chunk_distance > result_key[0]:
+                break
+
+            for entity in chunk:
+                if not isinstance(entity, entity_type):
+                    continue
+
+                entity_point = entities_map[entity]
+                distance = abs(entity_point.x - point.x) + abs(entity_point.y - point.y)
+                if distance >= max_radius:
+                    continue
+
+                key = (distance, self._order[entity])
+                if result is None or key < result_key:
+                    result_key = key
+                    result = (entity_point, entity)
+
+        return result
+
+    def within[T: Entity](
+        self,
+        entity_type: type[T],
+        point: Point,
+        radius: int,
+    ) -> list[tuple[Point, T]]:
+        """Get entities of the given type closer (|dx| + |dy|) than radius"""
+        result: list[tuple[Point, T]] = []
+        for entity_point, entity in self._iter_chunks(point, radius - 1):
+            if not isinstance(entity, entity_type):
+                continue
+
+            distance = abs(entity_point.x - point.x) + abs(entity_point.y - point.y)
+            if distance < radius:
+                result.append((entity_point, entity))
+
+        return result
+
+    def adjacent[T: Entity](
+        self,
+        entity_type: type[T],
+        point: Point,
+    ) -> tuple[Point, T] | None:
+        """Find the entity of the given type at the point or next to it.
+
+        Of several entities the one added earlier wins.
+        """
+        result: tuple[Point, T] | None = None
+        result_order = -1
+
+        for y in range(max(point.y - 1, 0), min(point.y + 2, self.hight)):
+            row = y * self.width
+            for x in range(max(point.x - 1, 0), min(point.x + 2, self.width)):
+                entity = self._cells[row + x]
+                if not isinstance(entity, entity_type):
+                    continue
+
+                # Static entities have no order, they are the earliest
+                order = self._order.get(entity, -1)
+                if result is None or order < result_order:
+                    result_order = order
+                    result = (Point(x, y), entity)
+
+        return result
+
+    def count(self, entity_type: type[Entity]) -> int:
+        """Number of the entities of the type, subclasses included,
+        static entities are counted once for every cell they take"""
+        counts = self._counts
+        return sum(
+            counts[counted_type]
+            for counted_type in self._get_counted_subclasses(entity_type)
+        )
+
+    def total_hp(self, creature_type: type[Creature]) -> int:
+        """Sum of the hp of the creatures of the type, subclasses included"""
+        total_hp = self._total_hp
+        return sum(
+            total_hp[counted_type]
+            for counted_type in self._get_counted_subclasses(creature_type)
+        )
+
+    def get_counts(self) -> dict[type[Entity], int]:
+        """Number of the entities of every type in the world (not subclasses)"""
+        return {
+            entity_type: count for entity_type, count in self._counts.items() if count
+        }
 
     def get_all_entitys(self) -> list[tuple[Point, Entity]]:
-        return [(point, entity) for entity, point in self._map.items()]
+        """Entities in the order they were added, then the static entities
+        in the order of the cells"""
+        entities = [(point, entity) for entity, point in self._map.items()]
+        entities.extend(self._get_static_entities(StaticEntity))
+        return entities
 
     def is_used(self, point: Point) -> bool:
-        return point in self._used_points
+        if point not in self:
+            return False
+        return self._cells[self._index(point)] is not None
+
+    def _add_entities(
+        self,
+        entities: Iterable[tuple[Point, Entity]],
+        observers: Sequence[WorldObserver],
+    ) -> None:
+        entities_map = self._map
+        cells = self._cells
+        chunks = self._chunks
+        order = self._order
+        order_counter = self._order_counter
+        type_buckets: dict[type[Entity], list[dict[Any, None]]] = {}
+        for point, entity in entities:
+            if isinstance(entity, StaticEntity):
+                self._add_static(point, entity, observers)
+                continue
+
+            if entity in entities_map:
+                raise ValueError("Entity is already in the world")
+
+            if point not in self:
+                raise PointOutsideWorldError
+
+            index = point.y * self.width + point.x
+            if cells[index] is not None:
+                raise PointAlreadyUsedError
+
+            entities_map[entity] = point
+            cells[index] = entity
+            self._free_count -= 1
+            chunks[self._chunk_index(point)][entity] = None
+            order[entity] = next(order_counter)
+            self._count_added(entity)
+
+            entity_type = type(entity)
+            buckets = type_buckets.get(entity_type)
+            if buckets is None:
+                buckets = self._get_type_buckets(entity_type)
+                type_buckets[entity_type] = buckets
+            for bucket in buckets:
+                bucket[entity] = None
+
+            for observer in observers:
+                observer.on_add(point, entity)
+
+    def _add_static(
+        self,
+        point: Point,
+        entity: StaticEntity,
+        observers: Sequence[WorldObserver],
+    ) -> None:
+        if point not in self:
+            raise PointOutsideWorldError
+
+        index = self._index(point)
+        if self._cells[index] is not None:
+            raise PointAlreadyUsedError
+
+        self._cells[index] = entity
+        self._free_count -= 1
+        self._count_added(entity)
+        for observer in observers:
+            observer.on_add(point, entity)
+
+    def _count_added(self, entity: Entity) -> None:
+        entity_type = type(entity)
+        count = self._counts.get(entity_type)
+        if count is None:
+            count = 0
+            self._total_hp[entity_type] = 0
+            self._counted_subclasses = {}
+        self._counts[entity_type] = count + 1
+        if isinstance(entity, Creature):
+            self._total_hp[entity_type] += entity.hp
+
+    def _count_removed(self, entity: Entity) -> None:
+        entity_type = type(entity)
+        self._counts[entity_type] -= 1
+        if isinstance(entity, Creature):
+            self._total_hp[entity_type] -= entity.hp
+
+    def _get_counted_subclasses(
+        self,
+        entity_type: type[Entity],
+    ) -> list[type[Entity]]:
+        subclasses = self._counted_subclasses.get(entity_type)
+        if subclasses is None:
+            subclasses = [
+                counted_type
+                for counted_type in self._counts
+                if issubclass(counted_type, entity_type)
+            ]
+            self._counted_subclasses[entity_type] = subclasses
+        return subclasses
+
+    def _get_static_entities[T: Entity](
+        self,
+        entity_type: type[T],
+    ) -> list[tuple[Point, T]]:
+        """Static entities are only in the cells, so the cells are scanned"""
+        width = self.width
+        return [
+            (from_cell(cell, width), entity)
+            for cell, entity in enumerate(self._cells)
+            if isinstance(entity, StaticEntity) and isinstance(entity, entity_type)
+        ]
+
+    def _index(self, point: Point) -> int:
+        return to_cell(point, self.width)
+
+    def _chunk_index(self, point: Point) -> int:
+        return (point.y // CHUNK_SIZE) * self._chunks_width + point.x // CHUNK_SIZE
+
+    def _iter_chunks(self, point: Point, radius: int) -> Iterator[tuple[Point, Entity]]:
+        """Iterate over entities of the chunks overlapping the square around point"""
+        if radius < 0:
+            return
+
+        first_x = max(point.x - radius, 0) // CHUNK_SIZE
+        last_x = min(point.x + radius, self.width - 1) // CHUNK_SIZE
+        first_y = max(point.y - radius, 0) // CHUNK_SIZE
+        last_y = min(point.y + radius, self.hight - 1) // CHUNK_SIZE
+
+        entities_map = self._map
+        for chunk_y in range(first_y, last_y + 1):
+            row = chunk_y * self._chunks_width
+            for chunk_x in range(first_x, last_x + 1):
+                for entity in self._chunks[row + chunk_x]:
+                    yield entities_map[entity], entity
+
+    def _get_chunks_by_distance(
+        self,
+        point: Point,
+        radius: int,
+    ) -> list[tuple[int, dict[Entity, None]]]:
+        """Get chunks overlapping the square around point, closest first.
+
+        The distance of a chunk is the smallest distance from the point
+        to any of its cells.
+        """
+        if radius < 0:
+            return []
+
+        first_x = max(point.x - radius, 0) // CHUNK_SIZE
+        last_x = min(point.x + radius, self.width - 1) // CHUNK_SIZE
+        first_y = max(point.y - radius, 0) // CHUNK_SIZE
+        last_y = min(point.y + radius, self.hight - 1) // CHUNK_SIZE
+
+        chunks: list[tuple[int, dict[Entity, None]]] = []
+        for chunk_y in range(first_y, last_y + 1):
+            top = chunk_y * CHUNK_SIZE
+            y_distance = max(top - point.y, point.y - top - CHUNK_SIZE + 1, 0)
+            row = chunk_y * self._chunks_width
+            for chunk_x in range(first_x, last_x + 1):
+                chunk = self._chunks[row + chunk_x]
+                if not chunk:
+                    continue
+
+                left = chunk_x * CHUNK_SIZE
+                x_distance = max(left - point.x, point.x - left - CHUNK_SIZE + 1, 0)
+                chunks.append((x_distance + y_distance, chunk))
+
+        chunks.sort(key=itemgetter(0))
+        return chunks
+
+    def _create_bucket[T: Entity](self, entity_type: type[T]) -> dict[T, None]:
+        bucket = {
+            entity: None for entity in self._map if isinstance(entity, entity_type)
+        }
+        self._buckets[entity_type] = bucket
+        self._type_buckets.clear()
+        return bucket
+
+    def _get_type_buckets(self, entity_type: type[Entity]) -> list[dict[Any, None]]:
+        type_buckets = self._type_buckets.get(entity_type)
+        if type_buckets is None:
+            type_buckets = [
+                bucket
+                for bucket_type, bucket in self._buckets.items()
+                if issubclass(entity_type, bucket_type)
+            ]
+            self._type_buckets[entity_type] = type_buckets
+        return type_buckets